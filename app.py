@@ -1,58 +1,354 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from processors.regression_progress_updater import RegressionProgressUpdater
+from metrics.startup_timer import StartupTimer
+
+# Startup timing report, logged on boot
+startup = StartupTimer()
+
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
+from processors.job_status import JobStatusBoard, PublishedStatuses
+from processors.job_executor import JobExecutor
+from processors.run_context import JobCancelled
+from processors.sync_targets import load_sync_targets
+from processors.coordinator import LeaseCoordinator
+from clients.client_registry import ClientRegistry
 from loggers.logging_config import LoggerSetup
-from config.config_manager import ConfigurationManager
-from scheduler import start_scheduler, update_scheduler_interval, scheduler, job_id
-from datetime import timezone
+from config.config_manager import LazyConfiguration
+from stores.issue_store import IssueStore
+from stores.run_store import RunStore
+from stores.state_backend import create_state_backend
+from metrics.metrics_registry import metrics
+from scheduler import start_scheduler, pause_scheduler, schedule_target, update_scheduler_interval, get_next_run
+from datetime import datetime, timezone
+import atexit
+import json
 import threading
+import time
 import os
 
+startup.mark("imports")
+
 app = Flask(__name__)
 
-logger = LoggerSetup.setup_logger("flask", "logs/flask")
-status = {
-    'running': False,
-    'progress': 0,
-    'last_run': None,
-    'last_status': 'Idle'
-}
+logger = LoggerSetup.lazy_logger("flask", "logs/flask")
+# Status of every sync target, by target name
+statuses = JobStatusBoard()
+# Statuses published by the leader, as last read from the state backend by this process
+published = PublishedStatuses()
+
+# Server-Sent Events tuning: the stream re-checks the schedule every SSE_POLL_SECONDS, sends at most
+# one event per SSE_MIN_INTERVAL_SECONDS and a keep-alive comment after SSE_KEEPALIVE_SECONDS of silence
+SSE_POLL_SECONDS = 5
+SSE_MIN_INTERVAL_SECONDS = 0.5
+SSE_KEEPALIVE_SECONDS = 15
 
 # Load your config instance
-config_manager = ConfigurationManager()
+config_manager = LazyConfiguration()
+
+startup.mark("app")
+
+def get_run_store():
+    return RunStore(config_manager.get("RUN_STORE_PATH", "data/run_history.db"))
 
-# Job execution function (threaded)
-def run_job():
-    status['running'] = True
-    status['progress'] = 0
-    status['last_status'] = 'Running'
+def get_targets():
+    """
+    The sync targets of config.json by name, read again on every call so config edits apply to the next run.
+    """
+    return {target.name: target for target in load_sync_targets(config_manager)}
+
+# Job execution function, run by the executor in a worker thread
+def run_job(ctx, full_rebuild=False):
+    # Imported on first run, the sync pulls in the Mantis and Google Sheets clients
+    from processors.regression_progress_updater import RegressionProgressUpdater
+
+    status = statuses.get(ctx.target)
+    status.start()
+    last_status = 'Completed Successfully'
+    outcome = 'success'
+    error = None
+    updater = None
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
 
     try:
-        updater = RegressionProgressUpdater()
-        updater.update_progress()
-        status['last_status'] = 'Completed Successfully'
+        with metrics.timer("sync_stage_duration_seconds", stage="total"):
+            # Clients live as long as the app, every run reuses their credentials and connections
+            target = get_targets().get(ctx.target)
+            if target is None:
+                raise Exception(f"Sync target {ctx.target} is no longer configured.")
+            # Every target shares the same clients, hence their connection pools and rate limiters
+            updater = RegressionProgressUpdater(
+                status=status,
+                mantis_ops=ClientRegistry.get_mantis_operations(),
+                sheet_ops=ClientRegistry.get_sheets_operations(),
+                target=target
+            )
+            updater.update_progress(full_rebuild=full_rebuild, ctx=ctx)
+    except JobCancelled as e:
+        logger.warning(f"Job {ctx.target} stopped: {e}")
+        last_status = f'Cancelled: {e}'
+        outcome = 'cancelled' if ctx.cancelled else 'timeout'
+        error = str(e)
     except Exception as e:
-        logger.error(f"Job failed: {e}")
-        status['last_status'] = f'Failed: {e}'
+        logger.error(f"Job {ctx.target} failed: {e}")
+        last_status = f'Failed: {e}'
+        outcome = 'failure'
+        error = str(e)
     finally:
-        status['running'] = False
-        status['progress'] = 100
+        metrics.inc("sync_runs_total", outcome=outcome)
+        record_run(
+            ctx.target, ctx.trigger, started_at, time.perf_counter() - start, outcome, error,
+            updater.run_stats if updater else {},
+            {'mantis': ctx.api_calls.get('mantis', 0), 'sheets': ctx.api_calls.get('sheets', 0)}
+        )
+        # Finish last so the run is already in the history when clients see it complete
+        status.finish(last_status)
+
+def record_run(target, trigger, started_at, duration, outcome, error, run_stats, api_calls):
+    """
+    Add a finished run to the run history. A failure to record never fails the job itself.
+    """
+    try:
+        get_run_store().add_run({
+            'target': target,
+            'trigger': trigger,
+            'started_at': started_at.strftime('%Y-%m-%d %H:%M:%S UTC'),
+            'finished_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
+            'duration_seconds': round(duration, 3),
+            'stage_durations': run_stats.get('stage_durations', {}),
+            'issues_fetched': run_stats.get('issues_fetched', 0),
+            'rows_written': run_stats.get('rows_written', 0),
+            'td_skipped': run_stats.get('td_skipped', 0),
+            'api_calls': api_calls,
+            'fetch_params': run_stats.get('fetch_params'),
+            'outcome': outcome,
+            'error': error
+        })
+    except Exception as e:
+        logger.error(f"Failed to record run history: {e}")
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def holds_lease():
+    return coordinator is not None and coordinator.holds_lease()
+
+# Runs of every target, at most SYNC_WORKERS at a time; a run stops before its next Sheets call
+# once this process may have lost the scheduler lease to another one
+executor = JobExecutor(run_job, lease=holds_lease)
+
+TRIGGER_MESSAGES = {
+    'started': 'triggered',
+    'queued': 'already running, it will run again when it finishes',
+    'coalesced': 'already running and another run is queued'
+}
+
+def scheduled_job(target_name):
+    executor.submit(target_name, 'scheduled')
+
+# Shared job state and scheduler lease, set up by start_background
+state = None
+coordinator = None
+_background_lock = threading.Lock()
+
+def start_background():
+    """
+    Connect to the state backend and take part in the scheduler election, once per process.
+
+    Only the process holding the lease schedules and executes syncs; it publishes the job
+    statuses to the backend, from which every other process serves /status and /events.
+    """
+    global state, coordinator
+    with _background_lock:
+        if coordinator is not None:
+            return
+        state = create_state_backend(config_manager)
+        lease_coordinator = LeaseCoordinator(
+            state, logger,
+            lease_seconds=config_manager.get("LEASE_SECONDS", 15),
+            poll_seconds=config_manager.get("STATE_POLL_SECONDS", 1),
+            on_elected=start_schedules,
+            on_demoted=stop_schedules,
+            on_tick=coordinator_tick
+        )
+        lease_coordinator.start()
+        if not lease_coordinator.is_leader:
+            published.update(state.get_statuses())
+        threading.Thread(target=publish_statuses, name="status-publisher", daemon=True).start()
+        # Hand the lease over right away on a clean shutdown
+        atexit.register(lease_coordinator.stop)
+        # Only now, so a failed start is tried again by the next request
+        coordinator = lease_coordinator
+
+@app.before_request
+def ensure_background():
+    start_background()
+
+def is_leader():
+    return coordinator is not None and coordinator.is_leader
+
+def start_schedules():
+    # Runs APScheduler for periodic jobs, one schedule per sync target
+    for target in get_targets().values():
+        schedule_target(target.name, scheduled_job, target.interval_minutes)
+    start_scheduler()
+
+def stop_schedules():
+    # Another process holds the lease now, it takes over the schedules and the runs
+    pause_scheduler()
+    executor.cancel_all()
+
+def coordinator_tick(leader):
+    """
+    Called by the coordinator of every process after each lease renewal.
+    """
+    # Edits made through another process, picked up by every process
+    if config_manager.reload_if_changed() and leader:
+        reschedule_targets()
+    apply_requests(leader)
+
+def apply_requests(leader):
+    """
+    Execute the triggers and cancellations that other processes sent through the state backend.
+    """
+    # Runs check the lease through `coordinator`, only start them once start_background set it
+    if not leader or coordinator is None:
+        return
+    for run_request in state.pop_requests():
+        if run_request['action'] == 'trigger':
+            executor.submit(run_request['target'], 'manual', **run_request['options'])
+        elif run_request['action'] == 'cancel':
+            executor.cancel(run_request['target'])
+
+def reschedule_targets():
+    # Targets without an interval of their own follow JOB_INTERVAL_MINUTES
+    for target in get_targets().values():
+        update_scheduler_interval(target.interval_minutes, target.name)
+
+def publish_statuses():
+    """
+    Publish the job statuses to the state backend whenever they change while this process is the
+    leader; otherwise read the published ones into `published`, the only backend read of the process.
+    """
+    version = None
+    while True:
+        try:
+            if is_leader():
+                version = statuses.wait_for_change(version, timeout=SSE_POLL_SECONDS)
+                state.save_statuses(get_status())
+            else:
+                published.update(state.get_statuses())
+        except Exception as e:
+            logger.error(f"Failed to share job statuses: {e}")
+        time.sleep(SSE_MIN_INTERVAL_SECONDS)
+
+def selected_targets():
+    """
+    Names of the targets selected by the `target` query parameter, every target if it is missing.
+
+    Returns:
+        list: The target names, or None if the requested target does not exist.
+    """
+    names = list(get_targets())
+    requested = request.args.get('target')
+    if not requested:
+        return names
+    return [requested] if requested in names else None
+
+def get_status(names=None):
+    """
+    Status of each target, with whether a run is waiting for a worker, queued or being cancelled,
+    and its next scheduled run.
+    """
+    names = names or list(get_targets())
+    snapshots = statuses.snapshot(names)
+    return [
+        dict(snapshots[name], name=name, next_run=format_run_time(get_next_run(name)), **{
+            key: value for key, value in executor.state(name).items() if key != 'running'
+        })
+        for name in names
+    ]
+
+def current_status(names=None):
+    """
+    Status of each target: computed here on the leader, as last published by the leader elsewhere.
+    """
+    if is_leader():
+        return get_status(names)
+    return [status for status in published.get() if names is None or status['name'] in names]
+
 @app.route('/trigger', methods=['POST'])
 def trigger():
-    if not status['running']:
-        thread = threading.Thread(target=run_job)
-        thread.start()
-        return jsonify({'message': 'Job triggered successfully.'})
-    else:
-        return jsonify({'message': 'Job is already running.'}), 409
+    names = selected_targets()
+    if names is None:
+        return jsonify({'message': 'Unknown sync target.'}), 404
+
+    full_rebuild = request.args.get('full', 'false').lower() == 'true'
+    if not is_leader():
+        for name in names:
+            state.add_request(name, 'trigger', {'full_rebuild': full_rebuild})
+        return jsonify({'message': f"Run requested for {', '.join(names)}."}), 202
+    results = {name: executor.submit(name, 'manual', full_rebuild=full_rebuild) for name in names}
+    message = ' '.join(f"{name}: {TRIGGER_MESSAGES[result]}." for name, result in results.items())
+    return jsonify({'message': message, 'results': results}), 200 if 'started' in results.values() else 202
+
+@app.route('/cancel', methods=['POST'])
+def cancel():
+    names = selected_targets()
+    if names is None:
+        return jsonify({'message': 'Unknown sync target.'}), 404
+
+    if not is_leader():
+        for name in names:
+            state.add_request(name, 'cancel')
+        return jsonify({'message': f"Cancellation requested for {', '.join(names)}."}), 202
+
+    cancelled = [name for name in names if executor.cancel(name)]
+    if cancelled:
+        return jsonify({'message': f"Cancellation requested for {', '.join(cancelled)}, runs stop at their next stage."})
+    return jsonify({'message': 'No job is running.'}), 409
 
 @app.route('/status', methods=['GET'])
 def job_status():
-    return jsonify(status)
+    names = selected_targets()
+    if names is None:
+        return jsonify({'message': 'Unknown sync target.'}), 404
+    lease = state.get_lease(coordinator.lease_name)
+    return jsonify({'targets': current_status(names), 'leader': lease['holder'] if lease else None})
+
+@app.route('/issues', methods=['GET'])
+def get_issues():
+    # Served from the local issue store of the target, no Mantis round-trip
+    targets = get_targets()
+    target = targets.get(request.args.get('target')) if request.args.get('target') else next(iter(targets.values()))
+    if target is None:
+        return jsonify({'message': 'Unknown sync target.'}), 404
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'message': 'limit and offset must be integers.'}), 400
+    issue_store = IssueStore(target.issue_store_path)
+
+    return jsonify(issue_store.query_issues(
+        status=request.args.get('status'),
+        resolution=request.args.get('resolution'),
+        handler=request.args.get('handler'),
+        limit=limit,
+        offset=offset
+    ))
+
+@app.route('/runs', methods=['GET'])
+def get_runs():
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'message': 'page and per_page must be integers.'}), 400
+    return jsonify(get_run_store().get_runs(page=page, per_page=per_page, target=request.args.get('target')))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/logs', methods=['GET'])
 def get_logs():
@@ -85,6 +381,8 @@ def config_data():
 @app.route('/config/update', methods=['POST'])
 def config_update():
     data = request.json
+    # Another process may have edited config.json, never write back an older copy of it
+    config_manager.reload()
     for key, value in data.items():
         config_manager.set(key, value)
     
@@ -94,29 +392,78 @@ def config_update():
 def update_interval():
     new_interval = int(request.json.get('interval'))
     
+    # Another process may have edited config.json, never write back an older copy of it
+    config_manager.reload()
     config_manager.set('JOB_INTERVAL_MINUTES', new_interval)
-    update_scheduler_interval(new_interval)
+    reschedule_targets()
     
     return jsonify({'message': f'Scheduler interval updated to {new_interval} minutes.'})
 
+def format_run_time(run_time):
+    """
+    Return a scheduled run time as a UTC string, or None if there is none.
+    """
+    if not run_time:
+        return None
+    # Convert to UTC ISO format or any readable format
+    return run_time.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+
+def get_next_run_time(target_statuses):
+    """
+    Return the earliest next scheduled run of the targets as a UTC string, or None if nothing is scheduled.
+    """
+    # The UTC strings sort chronologically
+    run_times = [status['next_run'] for status in target_statuses if status['next_run']]
+    return min(run_times) if run_times else None
+
 @app.route('/schedule/status', methods=['GET'])
 def schedule_status():
-    job = scheduler.get_job(job_id)
-    if not job:
-        return jsonify({'next_run': None, 'message': 'No job found'}), 404
-    
-    next_run_time = job.next_run_time
-    if next_run_time:
-        # Convert to UTC ISO format or any readable format
-        next_run_time_str = next_run_time.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
-    else:
-        next_run_time_str = None
+    target_statuses = current_status()
+    next_runs = {status['name']: status['next_run'] for status in target_statuses}
+    if not any(next_runs.values()):
+        return jsonify({'next_run': None, 'targets': next_runs, 'message': 'No job found'}), 404
 
     return jsonify({
-        'next_run': next_run_time_str
+        'next_run': get_next_run_time(target_statuses),
+        'targets': next_runs
+    })
+
+@app.route('/events', methods=['GET'])
+def events():
+    """
+    Server-Sent Events stream pushing the job status and next run time whenever they change.
+    """
+    def stream():
+        version = None
+        published_version = None
+        last_payload = None
+        last_sent = time.monotonic()
+        while True:
+            if is_leader():
+                version = statuses.wait_for_change(version, timeout=SSE_POLL_SECONDS)
+            else:
+                published_version = published.wait_for_change(published_version, timeout=SSE_POLL_SECONDS)
+            target_statuses = current_status()
+            payload = json.dumps({'targets': target_statuses, 'next_run': get_next_run_time(target_statuses)})
+            if payload != last_payload:
+                yield f"data: {payload}\n\n"
+                last_payload = payload
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            # Coalesce bursts of updates (e.g., one per row) into a few events per second
+            time.sleep(SSE_MIN_INTERVAL_SECONDS)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
 
 if __name__ == '__main__':
-    start_scheduler(run_job)  # Runs APScheduler for periodic jobs
+    # Schedules the sync targets once this process holds the scheduler lease
+    start_background()
+    startup.mark("scheduler")
+    logger.info(f"Startup took {startup.summary()}")
     app.run(host='0.0.0.0', port=5001)
@@ -0,0 +1,185 @@
+import json
+import multiprocessing
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Values the generated issues are drawn from
+CATEGORIES = ["General", "UI", "Backend", "Reports", "Billing"]
+PROJECTS = ["NEXUS06-BO", "NEXUS06-C3", "NEXUS06-C4", "NEXUS06-APP"]
+USERS = ["Jane Doe", "John Smith", "Ali Khan", "Sara Lee", "Omar Malik"]
+RESOLUTIONS = ["Open", "Fixed", "For QA", "Not Fixed", "Duplicate"]
+STATUSES = ["New", "In Progress", "Resolved", "Closed"]
+PRIORITIES = ["Low", "Normal", "High", "Urgent"]
+HISTORY_STATUSES = ["New", "In Progress", "Investigation in Progress", "Resolved"]
+BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+def make_issue(issue_id, history_depth=10, custom_field_count=4, seed=0):
+    """
+    Generate a Mantis issue, the same one for the same arguments.
+
+    Parameters:
+        issue_id (int): ID of the issue.
+        history_depth (int): Number of history entries.
+        custom_field_count (int): Number of custom fields, at least the four read by the sheet.
+        seed (int): Seed of the generated data set.
+
+    Returns:
+        dict: The issue, shaped like the Mantis REST API returns it.
+    """
+    rng = random.Random(seed * 1000003 + issue_id)
+    created = BASE_DATE + timedelta(minutes=issue_id)
+
+    custom_fields = [
+        {"field": {"id": 1, "name": "Record Type"}, "value": rng.choice(["Bug", "Enhancement", "Code Move"])},
+        {"field": {"id": 2, "name": "QA Owner"}, "value": rng.choice(USERS)},
+        {"field": {"id": 3, "name": "Faucet"}, "value": "Technical Debt." if rng.random() < 0.05 else "Regression"},
+        {"field": {"id": 4, "name": "Efforts Dev"}, "value": str(rng.randint(1, 40))}
+    ]
+    for number in range(5, custom_field_count + 1):
+        custom_fields.append({"field": {"id": number, "name": f"Custom Field {number}"}, "value": f"value {rng.randint(1, 100)}"})
+
+    history = []
+    for position in range(history_depth):
+        entry = {
+            "created_at": (created + timedelta(hours=position)).isoformat(),
+            "user": {"real_name": rng.choice(USERS)}
+        }
+        kind = rng.random()
+        if kind < 0.4:
+            entry["field"] = {"name": "status", "label": "Current Status"}
+            entry["old_value"] = {"label": rng.choice(HISTORY_STATUSES)}
+            entry["new_value"] = {"label": rng.choice(HISTORY_STATUSES)}
+        elif kind < 0.5:
+            entry["field"] = {"name": "source_changeset", "label": "Source_changeset_attached"}
+        elif kind < 0.6:
+            entry["field"] = {"name": "Root Cause", "label": "Root Cause"}
+            entry["old_value"] = ""
+            entry["new_value"] = rng.choice(["Code", "Requirement", "Configuration"])
+        else:
+            entry["field"] = {"name": "note", "label": "Note Added"}
+            entry["old_value"] = ""
+            entry["new_value"] = str(rng.randint(1, 10 ** 6))
+        history.append(entry)
+
+    return {
+        "id": issue_id,
+        "summary": f"Generated issue {issue_id}",
+        "category": {"name": rng.choice(CATEGORIES)},
+        "project": {"name": rng.choice(PROJECTS)},
+        "handler": {"real_name": rng.choice(USERS)},
+        "resolution": {"label": rng.choice(RESOLUTIONS)},
+        "status": {"label": rng.choice(STATUSES)},
+        "priority": {"label": rng.choice(PRIORITIES)},
+        "created_at": created.isoformat(),
+        "updated_at": (created + timedelta(hours=history_depth)).isoformat(),
+        "tags": [{"name": f"tag{rng.randint(1, 5)}"}],
+        "custom_fields": custom_fields,
+        "history": history
+    }
+
+class FakeMantisHandler(BaseHTTPRequestHandler):
+    # Set on the handler class of each server, see FakeMantisServer
+    options = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        options = self.options
+        time.sleep(options["latency"])
+
+        if url.path == "/api/rest/issues":
+            page = int(query.get("page", ["1"])[0])
+            page_size = int(query.get("page_size", ["50"])[0])
+            first = (page - 1) * page_size + 1
+            last = min(options["issue_count"], first + page_size - 1)
+            issues = [self._issue(issue_id) for issue_id in range(first, last + 1)]
+            self._send(200, {"issues": [self._select(issue, query) for issue in issues]})
+        elif url.path.startswith("/api/rest/issues/"):
+            issue_id = int(url.path.rsplit("/", 1)[1])
+            if 1 <= issue_id <= options["issue_count"]:
+                self._send(200, {"issues": [self._select(self._issue(issue_id), query)]})
+            else:
+                self._send(404, {"message": f"Issue #{issue_id} not found"})
+        else:
+            self._send(404, {"message": "Not found"})
+
+    def _issue(self, issue_id):
+        options = self.options
+        return make_issue(issue_id, options["history_depth"], options["custom_field_count"], options["seed"])
+
+    @staticmethod
+    def _select(issue, query):
+        if "select" not in query:
+            return issue
+        fields = query["select"][0].split(",")
+        return {field: issue[field] for field in fields if field in issue}
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep the benchmark output clean
+        pass
+
+def _serve(options, port_queue):
+    handler = type("Handler", (FakeMantisHandler,), {"options": options})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+class FakeMantisServer:
+    def __init__(self, issue_count=1000, latency=0.0, history_depth=10, custom_field_count=4, seed=0):
+        """
+        Local stand-in for the Mantis REST API, serving a generated filter of issue_count issues.
+
+        The server runs in its own process so that it neither competes for the GIL with the sync
+        under test nor shows up in its memory measurements.
+
+        Parameters:
+            issue_count (int): Number of issues in the filter.
+            latency (float): Seconds every request waits before answering.
+            history_depth (int): Number of history entries per issue.
+            custom_field_count (int): Number of custom fields per issue.
+            seed (int): Seed of the generated data set.
+        """
+        self.options = {
+            "issue_count": issue_count,
+            "latency": latency,
+            "history_depth": history_depth,
+            "custom_field_count": custom_field_count,
+            "seed": seed
+        }
+        self.process = None
+        self.url = None
+
+    def start(self):
+        """
+        Start the server and return its base URL.
+        """
+        port_queue = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_serve, args=(self.options, port_queue), daemon=True)
+        self.process.start()
+        self.url = f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+        return self.url
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,118 @@
+import re
+import threading
+from collections import Counter
+from clients.google_sheets_operations import GoogleSheetsOperations
+
+def parse_cell(cell):
+    """
+    Convert an A1 cell reference (e.g., "G1") to a zero-based (row, column) tuple.
+    """
+    match = re.fullmatch(r"([A-Z]+)(\d+)", cell.upper())
+    if not match:
+        raise Exception(f"Invalid cell reference: {cell}")
+    column = 0
+    for letter in match.group(1):
+        column = column * 26 + ord(letter) - ord("A") + 1
+    return int(match.group(2)) - 1, column - 1
+
+def parse_range(cell_range):
+    """
+    Convert an A1 range (e.g., "A3:R10" or "G1") to zero-based first and last (row, column) tuples.
+    """
+    first, _, last = cell_range.partition(":")
+    return parse_cell(first), parse_cell(last or first)
+
+class FakeWorksheet:
+    def __init__(self, client, title):
+        """
+        In-memory worksheet implementing the gspread calls made by the sync.
+        """
+        self.client = client
+        self.title = title
+        self.cells = {}
+
+    def update(self, cell_range, values, value_input_option=None):
+        self.client.count("update")
+        self._write(cell_range, values)
+
+    def update_acell(self, cell, value):
+        self.client.count("update_acell")
+        self._write(cell, [[value]])
+
+    def batch_update(self, data, value_input_option=None):
+        self.client.count("batch_update")
+        for update in data:
+            self._write(update["range"], update["values"])
+
+    def batch_clear(self, ranges):
+        self.client.count("batch_clear")
+        for cell_range in ranges:
+            (first_row, first_column), (last_row, last_column) = parse_range(cell_range)
+            for position in [cell for cell in self.cells
+                             if first_row <= cell[0] <= last_row and first_column <= cell[1] <= last_column]:
+                del self.cells[position]
+
+    def get_all_values(self):
+        self.client.count("get_all_values")
+        if not self.cells:
+            return []
+        height = max(row for row, _ in self.cells) + 1
+        width = max(column for _, column in self.cells) + 1
+        values = [[""] * width for _ in range(height)]
+        for (row, column), value in self.cells.items():
+            values[row][column] = value
+        return values
+
+    def _write(self, cell_range, values):
+        (first_row, first_column), _ = parse_range(cell_range)
+        for row_offset, row in enumerate(values):
+            for column_offset, value in enumerate(row):
+                position = (first_row + row_offset, first_column + column_offset)
+                if value in ("", None):
+                    self.cells.pop(position, None)
+                else:
+                    self.cells[position] = str(value)
+
+class FakeSpreadsheet:
+    def __init__(self, client, key):
+        self.client = client
+        self.key = key
+        self.worksheets = {}
+
+    def worksheet(self, title):
+        self.client.count("worksheet")
+        if title not in self.worksheets:
+            self.worksheets[title] = FakeWorksheet(self.client, title)
+        return self.worksheets[title]
+
+class FakeGspreadClient:
+    def __init__(self):
+        """
+        In-memory stand-in for an authorized gspread client, counting the API calls made to it.
+        Spreadsheets and worksheets are created on first access.
+        """
+        self.spreadsheets = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, operation):
+        with self._lock:
+            self.calls[operation] += 1
+
+    def open_by_key(self, key):
+        self.count("open_by_key")
+        if key not in self.spreadsheets:
+            self.spreadsheets[key] = FakeSpreadsheet(self, key)
+        return self.spreadsheets[key]
+
+class FakeSheetsOperations(GoogleSheetsOperations):
+    def __init__(self, client=None):
+        """
+        GoogleSheetsOperations backed by a FakeGspreadClient, so calls still go through
+        GoogleSheetsOperations.call and its metrics.
+        """
+        self.fake_client = client or FakeGspreadClient()
+        super().__init__(credentials_file=None)
+
+    def setup_google_sheets(self):
+        return self.fake_client
@@ -0,0 +1,162 @@
+"""
+Offline sync benchmark.
+
+Drives RegressionProgressUpdater.update_progress end-to-end against a local fake Mantis server and
+an in-memory Google Sheets stand-in, and reports wall time, peak memory, API calls and issues/sec.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --sizes 1000,10000,50000 --latency 0.05
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from benchmarks.fake_mantis import FakeMantisServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("full", "incremental", "stream")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Mantis to Google Sheets sync offline.")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma separated issue counts of the filter.")
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help="Comma separated sync modes to run per size, in order: full, incremental, stream.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds every fake Mantis request waits.")
+    parser.add_argument("--history-depth", type=int, default=10, help="History entries per issue.")
+    parser.add_argument("--custom-fields", type=int, default=8, help="Custom fields per issue (at least 4).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated issues.")
+    parser.add_argument("--lazy-history", action="store_true",
+                        help="List the filter without histories and fetch them only for the issues that need them.")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Do not trace memory; tracemalloc slows the run down noticeably.")
+    parser.add_argument("--verbose", action="store_true", help="Show the sync logs on the console.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    return parser.parse_args()
+
+def write_config(work_dir, lazy_history=False):
+    """
+    Write a copy of config.json for the benchmark and load it into the configuration manager.
+    Must run before any module that reads the configuration is imported.
+    """
+    with open(os.path.join(REPO_ROOT, "config.json")) as file:
+        config_data = json.load(file)
+    config_data.update({
+        "REGRESSION_FILTER_ID": "1",
+        "SYNC_MODE": "incremental",
+        "REGRESSION_SHEET_KEY": "benchmark",
+        "MANTIS_TICKETS_NEXUS_E6": "Regression",
+        "LAZY_HISTORY": lazy_history
+    })
+    config_file = os.path.join(work_dir, "config.json")
+    with open(config_file, "w") as file:
+        json.dump(config_data, file, indent=4)
+
+    from config.config_manager import ConfigurationManager
+    config = ConfigurationManager(config_file)
+    if config._config_file != config_file:
+        raise Exception("The configuration was loaded before the benchmark could override it.")
+    return config
+
+def run_mode(mode, mantis_ops, sheet_ops, issue_count, trace_memory):
+    """
+    Run one sync and measure it.
+
+    Returns:
+        dict: The measurements of the run.
+    """
+    from metrics.metrics_registry import metrics
+    from processors.regression_progress_updater import RegressionProgressUpdater
+
+    mantis_calls = metrics.total("mantis_requests_total")
+    sheets_calls = metrics.total("sheets_requests_total")
+    throttled = metrics.total("sheets_throttled_seconds_total")
+    fake_calls = sum(sheet_ops.fake_client.calls.values())
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    updater = RegressionProgressUpdater(mantis_ops=mantis_ops, sheet_ops=sheet_ops)
+    updater.update_progress(full_rebuild=mode == "full", stream=mode == "stream")
+    wall_time = time.perf_counter() - start
+
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "issues": issue_count,
+        "mode": mode,
+        "wall_seconds": round(wall_time, 3),
+        "peak_memory_mb": round(peak_memory / 2 ** 20, 1) if peak_memory is not None else None,
+        "mantis_calls": int(metrics.total("mantis_requests_total") - mantis_calls),
+        "sheets_calls": int(metrics.total("sheets_requests_total") - sheets_calls),
+        "fake_sheets_calls": sum(sheet_ops.fake_client.calls.values()) - fake_calls,
+        "sheets_throttled_seconds": round(metrics.total("sheets_throttled_seconds_total") - throttled, 3),
+        "issues_per_sec": round(issue_count / wall_time, 1) if wall_time else None,
+        "stage_durations": updater.run_stats["stage_durations"],
+        "rows_written": updater.run_stats["rows_written"],
+        "fetch_params": updater.run_stats.get("fetch_params")
+    }
+
+def print_results(results):
+    columns = ["issues", "mode", "wall_seconds", "peak_memory_mb", "mantis_calls", "sheets_calls", "issues_per_sec", "rows_written"]
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+
+def main():
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in MODES:
+            raise Exception(f"Unknown mode: {mode}")
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    # Loggers and the token files are resolved relative to the repository root
+    os.chdir(REPO_ROOT)
+    work_dir = tempfile.mkdtemp(prefix="sync_benchmark_")
+    results = []
+    try:
+        config = write_config(work_dir, args.lazy_history)
+        from clients.mantis_operations import MantisOperations
+        from benchmarks.fake_sheets import FakeSheetsOperations
+
+        for size in sizes:
+            server = FakeMantisServer(
+                issue_count=size,
+                latency=args.latency,
+                history_depth=args.history_depth,
+                custom_field_count=args.custom_fields,
+                seed=args.seed
+            )
+            with server:
+                # Fresh stores and sheet per size, shared by its modes so incremental runs see the full one
+                config.set("MANTIS_PATH", server.url)
+                config.set("ISSUE_STORE_PATH", os.path.join(work_dir, f"issue_store_{size}.db"))
+                mantis_ops = MantisOperations()
+                sheet_ops = FakeSheetsOperations()
+
+                for mode in modes:
+                    result = run_mode(mode, mantis_ops, sheet_ops, size, not args.no_memory)
+                    results.append(result)
+                    print(f"{size} issues, {mode}: {result['wall_seconds']}s, {result['issues_per_sec']} issues/s", flush=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print()
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+from threading import Lock
+from config.config_manager import ConfigurationManager
+
+class ClientRegistry:
+    _clients = {}
+    _lock = Lock()  # For thread safety
+
+    @staticmethod
+    def _file_version(path):
+        """
+        Identify the current content of a file by its modification time, or None if it is missing.
+        """
+        try:
+            return os.path.getmtime(path) if path else None
+        except OSError:
+            return None
+
+    @staticmethod
+    def _get(name, key, create):
+        """
+        Return the cached client of that name if it was created for the same key, otherwise
+        create it (outside of the lock, creation may be slow) and cache it.
+        """
+        with ClientRegistry._lock:
+            cached = ClientRegistry._clients.get(name)
+            if cached and cached[0] == key:
+                return cached[1]
+
+        client = create()
+        with ClientRegistry._lock:
+            cached = ClientRegistry._clients.get(name)
+            # Another thread may have created one for the same key in the meantime, keep a single one
+            if cached and cached[0] == key:
+                return cached[1]
+            ClientRegistry._clients[name] = (key, client)
+        return client
+
+    @staticmethod
+    def get_mantis_operations():
+        """
+        Get the application-wide MantisOperations, created on first use.
+
+        The token is only decrypted again when the Mantis URL or the key/token files change;
+        the client's connection pool stays warm between runs.
+        """
+        from clients.mantis_operations import MantisOperations
+
+        config = ConfigurationManager()
+        key = (
+            config.get("MANTIS_PATH"),
+            config.get("KEY_FILE"),
+            ClientRegistry._file_version(config.get("KEY_FILE")),
+            config.get("TOKEN_FILE"),
+            ClientRegistry._file_version(config.get("TOKEN_FILE"))
+        )
+        return ClientRegistry._get("mantis", key, MantisOperations)
+
+    @staticmethod
+    def get_sheets_operations(credentials_file=None):
+        """
+        Get the application-wide GoogleSheetsOperations, created on first use.
+
+        gspread is only authorized again when the service-account file changes. The access token
+        of the authorized client is refreshed by google-auth when it expires, so a long-lived
+        client keeps working across runs.
+
+        Parameters:
+            credentials_file (str): Service-account file; defaults to GS_CREDENTIAL_FILE.
+        """
+        from clients.google_sheets_operations import GoogleSheetsOperations
+
+        credentials_file = credentials_file or ConfigurationManager().get("GS_CREDENTIAL_FILE")
+        key = (credentials_file, ClientRegistry._file_version(credentials_file))
+        return ClientRegistry._get(
+            f"sheets:{credentials_file}", key, lambda: GoogleSheetsOperations(credentials_file=credentials_file)
+        )
+
+    @staticmethod
+    def clear():
+        """
+        Drop every cached client, so the next runs create new ones.
+        """
+        with ClientRegistry._lock:
+            ClientRegistry._clients.clear()
@@ -0,0 +1,125 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class AdaptiveFetchController:
+    def __init__(self, page_size=50, concurrency=4, min_page_size=25, max_page_size=500, page_size_step=25,
+                 min_concurrency=1, max_concurrency=8, target_seconds=2.0):
+        """
+        AIMD tuning of the Mantis filter fetch.
+
+        The number of in-flight page requests adapts during the run: it grows by one after a
+        window of `concurrency` pages answered within target_seconds, and is halved when a page
+        fails or is slower than target_seconds. The page size cannot change in the middle of a
+        paginated listing, so it adapts from run to run (see next_page_size).
+
+        Parameters:
+            page_size (int): Page size of this run.
+            concurrency (int): Initial number of in-flight page requests.
+            min_page_size, max_page_size (int): Bounds of the page size.
+            page_size_step (int): Additive increase of the page size between runs.
+            min_concurrency, max_concurrency (int): Bounds of the number of in-flight requests.
+            target_seconds (float): Page latency above which Mantis is considered overloaded.
+        """
+        self.min_page_size = min_page_size
+        self.max_page_size = max(min_page_size, max_page_size)
+        self.page_size_step = page_size_step
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.target_seconds = target_seconds
+
+        self.page_size = min(max(page_size, self.min_page_size), self.max_page_size)
+        self.initial_concurrency = min(max(concurrency, self.min_concurrency), self.max_concurrency)
+        self.concurrency = self.initial_concurrency
+
+        self._condition = threading.Condition()
+        self._active = 0
+        self._successes = 0
+        # Completions to ignore after a decrease: they were started at the previous concurrency
+        self._cooldown = 0
+        self.pages = 0
+        self.errors = 0
+        self.slow_pages = 0
+        self.total_seconds = 0.0
+        self.lowest_concurrency = self.concurrency
+        self.highest_concurrency = self.concurrency
+
+    @contextmanager
+    def request(self):
+        """
+        Hold one of the `concurrency` request slots for a page request, and feed its latency and
+        outcome back into the controller. An exception raised in the block counts as a failure.
+        """
+        with self._condition:
+            while self._active >= self.concurrency:
+                self._condition.wait()
+            self._active += 1
+
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self._record(time.perf_counter() - start, failed)
+
+    def _record(self, seconds, failed):
+        with self._condition:
+            self._active -= 1
+            self.pages += 1
+            self.total_seconds += seconds
+            if failed or seconds > self.target_seconds:
+                if failed:
+                    self.errors += 1
+                else:
+                    self.slow_pages += 1
+                self._decrease()
+            elif self._cooldown:
+                self._cooldown -= 1
+            else:
+                self._successes += 1
+                if self._successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self._successes = 0
+                    self.highest_concurrency = max(self.highest_concurrency, self.concurrency)
+            self._condition.notify_all()
+
+    def _decrease(self):
+        # Only the first signal of a burst counts, the requests already in flight report the same overload
+        if self._cooldown:
+            self._cooldown -= 1
+            return
+        self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+        self.lowest_concurrency = min(self.lowest_concurrency, self.concurrency)
+        self._successes = 0
+        self._cooldown = self._active
+
+    def next_page_size(self):
+        """
+        Page size for the next run: grown by page_size_step after a clean run whose pages came back
+        well within target on average, halved after a run with failed pages or over 10% slow pages.
+        """
+        with self._condition:
+            if self.errors or self.slow_pages > self.pages * 0.1:
+                return max(self.min_page_size, self.page_size // 2)
+            average = self.total_seconds / self.pages if self.pages else None
+            if average is not None and average < self.target_seconds / 2:
+                return min(self.max_page_size, self.page_size + self.page_size_step)
+            return self.page_size
+
+    def snapshot(self):
+        """
+        The parameters chosen and observed during the run, for the run log and history.
+        """
+        with self._condition:
+            return {
+                "page_size": self.page_size,
+                "initial_concurrency": self.initial_concurrency,
+                "final_concurrency": self.concurrency,
+                "lowest_concurrency": self.lowest_concurrency,
+                "highest_concurrency": self.highest_concurrency,
+                "pages": self.pages,
+                "errors": self.errors,
+                "slow_pages": self.slow_pages,
+                "average_page_seconds": round(self.total_seconds / self.pages, 3) if self.pages else None
+            }
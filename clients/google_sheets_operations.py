@@ -1,9 +1,39 @@
-import gspread
-from google.oauth2.service_account import Credentials
-from config.config_manager import ConfigurationManager
+import random
+import threading
+from contextlib import contextmanager, nullcontext
+from clients.rate_limiter import RateLimiterFactory
+from config.config_manager import LazyConfiguration
+from loggers.logging_config import LoggerSetup
+from metrics.metrics_registry import metrics
 
+sheets_logger = LoggerSetup.lazy_logger("google_sheets", "logs/google_sheets")
 # Initialize the configuration manager
-config = ConfigurationManager()
+config = LazyConfiguration()
+
+class SheetsApiProxy:
+    # Calls whose result is itself a Sheets API object whose calls must be routed too
+    _WRAPPED_RESULTS = {"open", "open_by_key", "open_by_url", "worksheet", "get_worksheet", "add_worksheet"}
+
+    def __init__(self, target, sheets_ops, ctx=None):
+        """
+        Wrap a gspread client, spreadsheet or worksheet so every method call goes through
+        GoogleSheetsOperations.call, on behalf of the run `ctx` if given.
+        """
+        self._target = target
+        self._sheets_ops = sheets_ops
+        self._ctx = ctx
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            result = self._sheets_ops.call(name, attribute, *args, ctx=self._ctx, **kwargs)
+            if name in self._WRAPPED_RESULTS:
+                return SheetsApiProxy(result, self._sheets_ops, self._ctx)
+            return result
+        return call
 
 class GoogleSheetsOperations:
     def __init__(self, credentials_file='credentials.json'):
@@ -17,14 +47,221 @@ class GoogleSheetsOperations:
             'https://www.googleapis.com/auth/drive'
         ]
         self.credentials_file = credentials_file
-        self.client = self.setup_google_sheets()
+        self.credentials = None
+        self.gspread_client = self.setup_google_sheets()
+        # Every call made through the client is routed through self.call
+        self.client = SheetsApiProxy(self.gspread_client, self)
+
+        # Ticket index and queued updates of the current ticket batch, per thread: one client
+        # serves the sync runs of every target at once (see _batch_state)
+        self._batch = threading.local()
 
     def setup_google_sheets(self):
         """
         Authorize and return a Google Sheets client.
         """
-        creds = Credentials.from_service_account_file(self.credentials_file, scopes=self.scope)
-        return gspread.authorize(creds)
+        # Imported on first use: gspread and google-auth are slow to import
+        import gspread
+        from google.oauth2.service_account import Credentials
+        from clients.sheets_http_client import DeadlineHTTPClient
+
+        self.credentials = Credentials.from_service_account_file(self.credentials_file, scopes=self.scope)
+        client = gspread.authorize(self.credentials, http_client=DeadlineHTTPClient)
+        # Capped by the time left to the run making each request, see call
+        client.set_timeout(config.get("SHEETS_TIMEOUT_SECONDS", 60))
+        return client
+
+    def refresh_credentials(self):
+        """
+        Refresh the access token if it is missing or expired, so a long-lived client keeps
+        working across runs without authorizing again.
+        """
+        if self.credentials is not None and not self.credentials.valid:
+            from google.auth.transport.requests import Request
+            self.credentials.refresh(Request())
+
+    def call(self, operation, function, *args, ctx=None, **kwargs):
+        """
+        Make a Google Sheets API call, recording its outcome and latency in the metrics registry.
+
+        Every call of the process takes a token from the shared "sheets" token bucket
+        (SHEETS_REQUESTS_PER_MINUTE, bursts of SHEETS_BURST). A call rejected for quota is
+        retried up to SHEETS_QUOTA_RETRIES times with truncated exponential backoff, during which
+        every other Sheets call of the process is held back too.
+
+        Parameters:
+            operation (str): Name of the call (e.g., batch_update), used as metric label.
+            function (callable): The gspread method to call.
+            ctx (RunContext): Optional, run whose deadline and scheduler lease are checked before
+                every attempt, and whose deadline caps the timeout of the HTTP requests of the call.
+        """
+        limiter = RateLimiterFactory.get_limiter(
+            "sheets",
+            rate=config.get("SHEETS_REQUESTS_PER_MINUTE", 60) / 60,
+            capacity=config.get("SHEETS_BURST", 10)
+        )
+        retries = config.get("SHEETS_QUOTA_RETRIES", 5)
+        self.refresh_credentials()
+
+        for attempt in range(retries + 1):
+            waited = limiter.acquire()
+            if waited:
+                metrics.inc("sheets_throttled_seconds_total", waited)
+            if ctx:
+                ctx.check_deadline()
+                ctx.check_lease()
+
+            outcome = "error"
+            try:
+                with metrics.timer("sheets_request_duration_seconds", operation=operation), self.run_timeouts(ctx):
+                    result = function(*args, **kwargs)
+                outcome = "ok"
+                return result
+            except Exception as e:
+                if not self.is_quota_error(e) or attempt == retries:
+                    raise
+                outcome = "quota_exceeded"
+                delay = min(
+                    config.get("SHEETS_MAX_BACKOFF_SECONDS", 64),
+                    config.get("SHEETS_BACKOFF_SECONDS", 2) * 2 ** attempt + random.uniform(0, 1)
+                )
+                sheets_logger.warning(f"Sheets quota exceeded on {operation}, retrying in {delay:.1f}s (attempt {attempt + 1}/{retries})")
+                limiter.pause(delay)
+            finally:
+                metrics.inc("sheets_requests_total", operation=operation, status=outcome)
+                if ctx:
+                    ctx.count_call("sheets")
+
+    def run_timeouts(self, ctx):
+        """
+        Context in which the HTTP requests of the calling thread are bounded by the deadline of ctx.
+        """
+        http_client = getattr(self.gspread_client, "http_client", None)
+        if ctx is None or not hasattr(http_client, "for_run"):
+            return nullcontext()
+        return http_client.for_run(ctx)
+
+    @staticmethod
+    def is_quota_error(error):
+        """
+        Whether a gspread error reports an exhausted quota or rate limit (HTTP 429).
+        """
+        response = getattr(error, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return True
+        message = str(error)
+        return any(marker in message for marker in ("RESOURCE_EXHAUSTED", "RATE_LIMIT_EXCEEDED", "Quota exceeded"))
+
+    def open_worksheet(self, spreadsheet_key, worksheet_name, ctx=None):
+        """
+        Open a worksheet of a spreadsheet; the returned worksheet routes its calls through self.call.
+
+        Parameters:
+            ctx (RunContext): Optional, run on behalf of which the worksheet is used.
+        """
+        return SheetsApiProxy(self.gspread_client, self, ctx).open_by_key(spreadsheet_key).worksheet(worksheet_name)
+
+    def get_ticket_index(self, refresh=False):
+        """
+        Map every ticket ID found in the code move worksheets to its (worksheet, row) locations.
+
+        The index is built with a single download per worksheet and cached for the current
+        ticket batch (see ticket_batch); outside of a batch it is rebuilt on every call.
+
+        Parameters:
+            refresh (bool): Rebuild the index even if a cached one exists.
+
+        Returns:
+            dict: Ticket ID (int) to a list of (worksheet, row number) tuples.
+        """
+        batch = self._batch_state()
+        if batch.ticket_index is not None and not refresh:
+            return batch.ticket_index
+
+        # Open the spreadsheet
+        spread_sheet = self.client.open_by_key(config.get("CODE_MOVE_SHEET_KEY"))
+
+        ticket_index = {}
+        for worksheet_name in (config.get("MASTER_64_TO_NEXUS"), config.get("MASTER_65_TO_NEXUS")):
+            sheet = spread_sheet.worksheet(worksheet_name)
+            data = sheet.get_all_values()
+            for i in range(1, len(data)):
+                if data[i] and data[i][0] and '#' in data[i][0]:
+                    try:
+                        ticket_id_from_sheet = int(data[i][0].split('#')[1])
+                    except ValueError:
+                        continue
+                    ticket_index.setdefault(ticket_id_from_sheet, []).append((sheet, i + 1))
+
+        if batch.depth:
+            batch.ticket_index = ticket_index
+        return ticket_index
+
+    @contextmanager
+    def ticket_batch(self):
+        """
+        Group ticket updates: the ticket index is built once, and every update made through the
+        update_*_in_sheet methods inside the block is applied at the end with a single
+        batch_update per worksheet. The batch only covers the updates of the calling thread.
+        """
+        batch = self._batch_state()
+        batch.depth += 1
+        try:
+            yield self
+            if batch.depth == 1 and batch.pending_updates:
+                self.update_tickets_in_sheet(batch.pending_updates)
+        finally:
+            batch.depth -= 1
+            if not batch.depth:
+                batch.pending_updates = {}
+                batch.ticket_index = None
+
+    def _batch_state(self):
+        """
+        Ticket batch of the calling thread: its nesting depth, queued updates and cached ticket index.
+        """
+        batch = self._batch
+        if not hasattr(batch, "depth"):
+            batch.depth = 0
+            batch.pending_updates = {}
+            batch.ticket_index = None
+        return batch
+
+    def update_tickets_in_sheet(self, updates):
+        """
+        Apply many ticket updates with a single batch_update per worksheet.
+
+        Parameters:
+            updates (dict): Ticket ID to a dict with any of the keys "dev_status" (bool) and
+                "comments" (str).
+        """
+        try:
+            ticket_index = self.get_ticket_index()
+
+            # Collect the cell updates of every worksheet
+            sheet_updates = {}
+            for original_ticket_id, fields in updates.items():
+                for sheet, row in ticket_index.get(int(str(original_ticket_id)), []):
+                    _, cell_updates = sheet_updates.setdefault(sheet.id, (sheet, []))
+                    if "dev_status" in fields:
+                        cell_updates.append({"range": f"P{row}", "values": [[fields["dev_status"]]]})  # DEV Status
+                    if "comments" in fields:
+                        cell_updates.append({"range": f"R{row}", "values": [[fields["comments"]]]})  # Comments
+
+            for sheet, cell_updates in sheet_updates.values():
+                sheet.batch_update(cell_updates, value_input_option='USER_ENTERED')
+        except Exception as e:
+            raise Exception(f"Error updating status in sheets: {e}")
+
+    def _queue_ticket_update(self, original_ticket_id, **fields):
+        """
+        Apply a ticket update now, or queue it until the end of the current ticket batch.
+        """
+        batch = self._batch_state()
+        if batch.depth:
+            batch.pending_updates.setdefault(int(str(original_ticket_id)), {}).update(fields)
+        else:
+            self.update_tickets_in_sheet({original_ticket_id: fields})
 
     def update_dev_status_in_sheet(self, original_ticket_id):
         """
@@ -36,35 +273,7 @@ class GoogleSheetsOperations:
         if original_ticket_id is None:
             return
 
-        try:
-            # Open the spreadsheet
-            spread_sheet = self.client.open_by_key(config.get("CODE_MOVE_SHEET_KEY"))
-
-            # Fetch data from both sheets
-            sheet_64 = spread_sheet.worksheet(config.get("MASTER_64_TO_NEXUS"))
-            data_64 = sheet_64.get_all_values()
-
-            sheet_65 = spread_sheet.worksheet(config.get("MASTER_65_TO_NEXUS"))  # Add the name of the second sheet
-            data_65 = sheet_65.get_all_values()
-
-            # Combine the data from both sheets
-            all_data = [(sheet_64, data_64)] + [(sheet_65, data_65)]
-
-            # Remove leading zeros from the ticket ID
-            original_ticket_id_number = int(str(original_ticket_id).lstrip('0'))
-
-            # Search for the ticket ID in the combined data
-            for sheet, data in all_data:
-                for i in range(1, len(data)):
-                    if data[i][0] and '#' in data[i][0]:
-                        ticket_id_from_sheet = int(data[i][0].split('#')[1].lstrip('0'))
-                        if ticket_id_from_sheet == original_ticket_id_number:
-                            sheet.update_cell(i + 1, 16, True)  # Update DEV Status
-                            # Uncomment if QA Status also needs updating
-                            # sheet.update_cell(i + 1, 17, True)
-                            # return  # Exit the function once the update is complete
-        except Exception as e:
-            raise Exception(f"Error updating status in sheets: {e}")
+        self._queue_ticket_update(original_ticket_id, dev_status=True)
 
 
     def update_comments_in_sheet(self, original_ticket_id, comments):
@@ -77,34 +286,7 @@ class GoogleSheetsOperations:
         if original_ticket_id is None:
             return
 
-        try:
-            # Open the spreadsheet
-            spread_sheet = self.client.open_by_key(config.get("CODE_MOVE_SHEET_KEY"))
-
-            # Fetch data from both sheets
-            sheet_64 = spread_sheet.worksheet(config.get("MASTER_64_TO_NEXUS"))
-            data_64 = sheet_64.get_all_values()
-
-            sheet_65 = spread_sheet.worksheet(config.get("MASTER_65_TO_NEXUS"))  # Add the name of the second sheet
-            data_65 = sheet_65.get_all_values()
-
-            # Combine the data from both sheets
-            all_data = [(sheet_64, data_64)] + [(sheet_65, data_65)]
-
-            # Remove leading zeros from the ticket ID
-            original_ticket_id_number = int(original_ticket_id.lstrip('0'))
-
-            # Search for the ticket ID in the combined data
-            for sheet, data in all_data:
-                for i in range(1, len(data)):
-                    if data[i][0] and '#' in data[i][0]:
-                        ticket_id_from_sheet = int(data[i][0].split('#')[1].lstrip('0'))
-                        if ticket_id_from_sheet == original_ticket_id_number:
-                            sheet.update_cell(i + 1, 18, comments)  # Updating the Comments
-                            
-                            # return  # Exit the function once the update is complete
-        except Exception as e:
-            raise Exception(f"Error updating status in sheets: {e}")
+        self._queue_ticket_update(original_ticket_id, comments=comments)
         
 
     def update_comments_and_dev_status_in_sheet(self, original_ticket_id, comments):
@@ -117,31 +299,4 @@ class GoogleSheetsOperations:
         if original_ticket_id is None:
             return
 
-        try:
-            # Open the spreadsheet
-            spread_sheet = self.client.open_by_key(config.get("CODE_MOVE_SHEET_KEY"))
-
-            # Fetch data from both sheets
-            sheet_64 = spread_sheet.worksheet(config.get("MASTER_64_TO_NEXUS"))
-            data_64 = sheet_64.get_all_values()
-
-            sheet_65 = spread_sheet.worksheet(config.get("MASTER_65_TO_NEXUS"))  # Add the name of the second sheet
-            data_65 = sheet_65.get_all_values()
-
-            # Combine the data from both sheets
-            all_data = [(sheet_64, data_64)] + [(sheet_65, data_65)]
-
-            # Remove leading zeros from the ticket ID
-            original_ticket_id_number = int(original_ticket_id.lstrip('0'))
-
-            # Search for the ticket ID in the combined data
-            for sheet, data in all_data:
-                for i in range(1, len(data)):
-                    if data[i][0] and '#' in data[i][0]:
-                        ticket_id_from_sheet = int(data[i][0].split('#')[1].lstrip('0'))
-                        if ticket_id_from_sheet == original_ticket_id_number:
-                            sheet.update_cell(i + 1, 16, True)  # Update DEV Status
-                            sheet.update_cell(i + 1, 18, comments)  # Updating the Comments
-                            # return  # Exit the function once the update is complete
-        except Exception as e:
-            raise Exception(f"Error updating status in sheets: {e}")
\ No newline at end of file
+        self._queue_ticket_update(original_ticket_id, dev_status=True, comments=comments)
@@ -0,0 +1,56 @@
+import requests
+from threading import Lock
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpSessionFactory:
+    _sessions = {}
+    _lock = Lock()  # For thread safety
+
+    @staticmethod
+    def get_session(name, pool_size=10, max_retries=3, backoff_factor=0.5):
+        """
+        Get a shared, connection-pooled session, creating it on first use.
+
+        Sessions are keyed by name so every client of the same service reuses the same
+        keep-alive connections. Idempotent requests are retried with exponential backoff
+        on connection errors and on 429/5xx responses (honouring Retry-After).
+
+        Parameters:
+            name (str): Name of the session (e.g., mantis).
+            pool_size (int): Maximum number of pooled connections per host.
+            max_retries (int): Number of retries before the last response is returned.
+            backoff_factor (float): Base delay in seconds for the exponential backoff.
+
+        Returns:
+            requests.Session: The shared session.
+        """
+        with HttpSessionFactory._lock:
+            session = HttpSessionFactory._sessions.get(name)
+            if session is None:
+                retry = Retry(
+                    total=max_retries,
+                    backoff_factor=backoff_factor,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"PATCH"},
+                    respect_retry_after_header=True,
+                    raise_on_status=False     # Hand the final response back to the caller
+                )
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                HttpSessionFactory._sessions[name] = session
+            return session
+
+    @staticmethod
+    def close_all():
+        """
+        Close every shared session and drop it from the cache.
+        """
+        with HttpSessionFactory._lock:
+            for session in HttpSessionFactory._sessions.values():
+                session.close()
+            HttpSessionFactory._sessions.clear()
@@ -0,0 +1,119 @@
+import codecs
+import json
+
+# Characters skipped between JSON tokens
+_WHITESPACE = " \t\n\r"
+# Characters that can follow a complete value
+_VALUE_END = _WHITESPACE + ",:]}"
+
+class JsonArrayStream:
+    def __init__(self, chunks, array_key, compact_after=1 << 16):
+        """
+        Incrementally decode a JSON object of the form {"<array_key>": [item, ...], ...} from a
+        stream of byte chunks, yielding the items of the array one at a time.
+
+        Only the undecoded tail of the stream and the item being decoded are held in memory. The
+        other top-level fields (e.g., total_count) are collected in self.fields as they are read;
+        fields placed after the array are only available once the iteration is over.
+
+        Parameters:
+            chunks (iterable): UTF-8 encoded chunks of the document (e.g., response.iter_content()).
+            array_key (str): Key of the array whose items are yielded.
+            compact_after (int): Number of consumed characters after which the buffer is trimmed.
+        """
+        self.fields = {}
+        self._chunks = iter(chunks)
+        self._array_key = array_key
+        self._compact_after = compact_after
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+
+    def __iter__(self):
+        self._expect("{")
+        if self._token() == "}":
+            self._pos += 1
+            return
+
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == self._array_key:
+                yield from self._items()
+            else:
+                self.fields[key] = self._value()
+
+            separator = self._token()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise Exception(f"Malformed JSON document: expected ',' or '}}', got {separator!r}.")
+
+    def _items(self):
+        self._expect("[")
+        if self._token() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield self._value()
+            separator = self._token()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise Exception(f"Malformed JSON document: expected ',' or ']', got {separator!r}.")
+
+    def _value(self):
+        """
+        Decode the JSON value at the current position, reading more of the stream until it is complete.
+        """
+        self._token()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value not followed by a delimiter may continue in the next chunk, e.g. a number
+                # cut after its "." or "e" decodes as its integer part
+                if self._exhausted or (end < len(self._buffer) and self._buffer[end] in _VALUE_END):
+                    self._pos = end
+                    self._compact()
+                    return value
+            except json.JSONDecodeError:
+                if self._exhausted:
+                    raise
+            self._read()
+
+    def _token(self):
+        """
+        Skip whitespace and return the next character without consuming it.
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._exhausted:
+                raise Exception("Malformed JSON document: unexpected end of stream.")
+            self._read()
+
+    def _expect(self, character):
+        found = self._token()
+        if found != character:
+            raise Exception(f"Malformed JSON document: expected {character!r}, got {found!r}.")
+        self._pos += 1
+
+    def _read(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._buffer += self._utf8.decode(b"", final=True)
+            self._exhausted = True
+        elif chunk:
+            self._buffer += self._utf8.decode(chunk)
+
+    def _compact(self):
+        if self._pos >= self._compact_after:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
@@ -1,11 +1,19 @@
-import requests
+import math
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, nullcontext
+from clients.http_session import HttpSessionFactory
+from clients.json_stream import JsonArrayStream
 from loggers.logging_config import LoggerSetup
 from encryption.token_manager import TokenManager
-from config.config_manager import ConfigurationManager
+from config.config_manager import LazyConfiguration
+from metrics.metrics_registry import metrics
 
-mantis_logger = LoggerSetup.setup_logger("mantis", "logs/mantis")
+mantis_logger = LoggerSetup.lazy_logger("mantis", "logs/mantis")
 # Initialize the configuration manager
-config = ConfigurationManager()
+config = LazyConfiguration()
 
 class MantisOperations:
     
@@ -25,12 +33,49 @@ class MantisOperations:
             'Content-Type': 'application/json'
         }
 
-    def get_ticket_data(self, ticket_number):
+        # Shared keep-alive connection pool used by every Mantis call
+        self.session = HttpSessionFactory.get_session(
+            "mantis",
+            pool_size=config.get("MANTIS_POOL_SIZE", 10),
+            max_retries=config.get("MANTIS_MAX_RETRIES", 3),
+            backoff_factor=config.get("MANTIS_BACKOFF_FACTOR", 0.5)
+        )
+        self.timeout = (config.get("MANTIS_CONNECT_TIMEOUT", 5), config.get("MANTIS_READ_TIMEOUT", 60))
+
+    def _request(self, method, url, ctx=None, **kwargs):
+        """
+        Send a request to Mantis through the shared session with the configured timeouts,
+        recording its outcome and latency in the metrics registry.
+
+        Parameters:
+            ctx (RunContext): Optional, run whose deadline caps the timeouts of the request.
+        """
+        # Label by route, with IDs and the query string stripped to keep the label set small
+        endpoint = re.sub(r"/\d+", "/{id}", url[len(self.mantis_path):].split("?")[0])
+        timeout = ctx.timeout(self.timeout) if ctx else self.timeout
+        outcome = "error"
+        try:
+            with metrics.timer("mantis_request_duration_seconds", method=method, endpoint=endpoint):
+                response = self.session.request(method, url, headers=self.headers, timeout=timeout, verify=False, **kwargs)
+            outcome = str(response.status_code)
+            return response
+        finally:
+            metrics.inc("mantis_requests_total", method=method, endpoint=endpoint, status=outcome)
+            if ctx:
+                ctx.count_call("mantis")
+
+    def get_ticket_data(self, ticket_number, fields=None, ctx=None):
         """
         Fetch ticket data by ticket number.
+
+        Parameters:
+            fields (list): Optional list of issue fields to select (e.g., ["id", "history"]).
+            ctx (RunContext): Optional, run whose deadline bounds the request.
         """
         ticket_url = f"{self.mantis_path}/api/rest/issues/{ticket_number}"
-        response = requests.get(ticket_url, headers=self.headers, verify=False)
+        if fields:
+            ticket_url += f"?select={','.join(fields)}"
+        response = self._request("GET", ticket_url, ctx=ctx)
         if response.status_code == 200:
             return response.json()
         else:
@@ -47,7 +92,7 @@ class MantisOperations:
         """
         note_url = f"{self.mantis_path}/api/rest/issues/{ticket_number}/notes"
         payload = {"text": note_text}
-        response = requests.post(note_url, headers=self.headers, json=payload, verify=False)
+        response = self._request("POST", note_url, json=payload)
         if response.status_code != 201:
             mantis_logger.error(f'Error while adding note to ticket {ticket_number}: {response.text}')
 
@@ -57,33 +102,187 @@ class MantisOperations:
         """
         close_ticket_url = f"{self.mantis_path}/api/rest/issues/{ticket_number}"
         payload = {"status": {"name": "closed"}}
-        response = requests.patch(close_ticket_url, headers=self.headers, json=payload, verify=False)
+        response = self._request("PATCH", close_ticket_url, json=payload)
         if response.status_code != 200:
             mantis_logger.error(f'Error while closing ticket {ticket_number}: {response.text}')
 
-    def get_tickets_from_filter(self, filter_id):
+    def get_tickets_from_filter(self, filter_id, concurrency=None, fields=None, on_page=None, project=None, controller=None,
+                                ctx=None):
+        """
+        Get tickets from a Mantis filter.
+
+        The first page is fetched on its own to discover the size of the filter, the
+        remaining pages are then requested concurrently and reassembled in page order.
+
+        Parameters:
+            filter_id (str): The Mantis filter ID.
+            concurrency (int): Maximum number of in-flight page requests. Defaults to the
+                MANTIS_FETCH_CONCURRENCY config value.
+            fields (list): Optional list of issue fields to select (e.g., ["id", "updated_at"]).
+            on_page (callable): Called as on_page(issue_count, pages_total) for every fetched page;
+                pages_total is None if Mantis did not report the filter size.
+            project (callable): Optional, maps each decoded issue to the record kept for it.
+            controller (AdaptiveFetchController): Optional, tunes the page size and the number of
+                in-flight requests instead of MANTIS_PAGE_SIZE and `concurrency`.
+            ctx (RunContext): Optional, run whose deadline bounds every request.
+
+        Returns:
+            list: The issues of the filter, in the order Mantis returns them.
         """
-        Get ticket IDs from a Mantis filter.
+        pages = self.iter_filter_pages(filter_id, concurrency, fields, on_page, project, controller, ctx)
+        return [issue for page in pages for issue in page]
+
+    def iter_filter_pages(self, filter_id, concurrency=None, fields=None, on_page=None, project=None, controller=None,
+                          ctx=None):
         """
-        tickets = []
-        page = 1
-        limit = 50  # Fetch up to 50 tickets per page
-        while True:
-            filter_url = f"{self.mantis_path}/api/rest/issues?filter_id={filter_id}&page={page}&limit={limit}"
+        Yield the pages of a Mantis filter in order, fetching up to `concurrency` pages ahead.
+
+        Only the pages that have been fetched but not consumed yet are held in memory, so a slow
+        consumer bounds the memory used by the fetch.
+
+        Parameters:
+            filter_id (str): The Mantis filter ID.
+            concurrency (int): Maximum number of in-flight page requests. Defaults to the
+                MANTIS_FETCH_CONCURRENCY config value.
+            fields (list): Optional list of issue fields to select (e.g., ["id", "updated_at"]).
+            on_page (callable): Called as on_page(issue_count, pages_total) for every fetched page.
+            project (callable): Optional, maps each decoded issue to the record kept for it.
+            controller (AdaptiveFetchController): Optional, tunes the page size and the number of
+                in-flight requests instead of MANTIS_PAGE_SIZE and `concurrency`.
+            ctx (RunContext): Optional, run whose deadline bounds every request.
+
+        Yields:
+            list: The issues of each page.
+        """
+        if controller:
+            limit = controller.page_size
+            max_workers = controller.max_concurrency
+            window = lambda: controller.concurrency
+        else:
+            limit = config.get("MANTIS_PAGE_SIZE", 50)
+            max_workers = max(1, concurrency or config.get("MANTIS_FETCH_CONCURRENCY", 4))
+            window = lambda: max_workers
+
+        first_page = self._fetch_filter_page(filter_id, 1, limit, fields, project, controller, ctx)
+        issues = first_page.get("issues", [])
+
+        # With a total count from Mantis only the existing pages are requested, otherwise
+        # pages are probed until a short page is seen
+        total_count = first_page.get("total_count")
+        last_page = math.ceil(int(total_count) / limit) if total_count else None
+
+        if on_page:
+            on_page(len(issues), last_page)
+        yield issues
+        if len(issues) < limit:
+            return
+
+        def fetch_issues(page):
+            return self._fetch_filter_page(filter_id, page, limit, fields, project, controller, ctx).get("issues", [])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = deque()
+            next_page = 2
             try:
-                response = requests.get(filter_url, headers=self.headers, verify=False)
-                if response.status_code != 200:
-                    mantis_logger.error(f'Error fetching tickets from Mantis filter: {response.text}')
-                    break
-                ticket_data = response.json()
-                tickets.extend(ticket_data.get("issues", []))
-                if len(ticket_data.get("issues", [])) < limit:
-                    break
-                page += 1
+                while True:
+                    while len(in_flight) < window() and (last_page is None or next_page <= last_page):
+                        in_flight.append(executor.submit(fetch_issues, next_page))
+                        next_page += 1
+                    if not in_flight:
+                        return
+
+                    issues = in_flight.popleft().result()
+                    if on_page:
+                        on_page(len(issues), last_page)
+                    yield issues
+                    if len(issues) < limit:
+                        return
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    def _fetch_filter_page(self, filter_id, page, limit, fields=None, project=None, controller=None, ctx=None):
+        """
+        Fetch a single page of a Mantis filter, retrying the page on failure.
+
+        With MANTIS_STREAM_JSON the page is decoded from the response stream one issue at a time,
+        and each issue is passed through `project` right away, so neither the raw body nor the
+        full issue dicts of the page are held in memory at once.
+
+        Parameters:
+            project (callable): Optional, maps each decoded issue to the record kept for it.
+            controller (AdaptiveFetchController): Optional, gates every attempt and is fed its
+                latency and outcome.
+            ctx (RunContext): Optional, run whose deadline bounds every attempt, including the
+                streamed read of the response.
+
+        Raises:
+            Exception: If the page could not be fetched after MANTIS_PAGE_RETRIES attempts.
+            JobCancelled: If the run went past its deadline; the page is not retried.
+        """
+        filter_url = f"{self.mantis_path}/api/rest/issues?filter_id={filter_id}&page={page}&page_size={limit}"
+        if fields:
+            filter_url += f"&select={','.join(fields)}"
+        stream_json = config.get("MANTIS_STREAM_JSON", True)
+        retries = config.get("MANTIS_PAGE_RETRIES", 3)
+        for attempt in range(1, retries + 1):
+            try:
+                with controller.request() if controller else nullcontext():
+                    response = self._request("GET", filter_url, ctx=ctx, stream=stream_json)
+                    with closing(response):
+                        if response.status_code != 200:
+                            raise Exception(response.text)
+                        if not stream_json:
+                            page_data = response.json()
+                            if project:
+                                page_data["issues"] = [project(issue) for issue in page_data.get("issues", [])]
+                            return page_data
+                        chunks = response.iter_content(chunk_size=1 << 16)
+                        issues_stream = JsonArrayStream(ctx.checked(chunks) if ctx else chunks, "issues")
+                        issues = [project(issue) if project else issue for issue in issues_stream]
+                        return dict(issues_stream.fields, issues=issues)
             except Exception as e:
-                mantis_logger.error(f"Error fetching tickets from Mantis filter: {e}")
-                break
-        return tickets
+                # Past the deadline there is no point in retrying
+                if ctx:
+                    ctx.check_deadline()
+                error = e
+            mantis_logger.error(f"Error fetching page {page} of Mantis filter {filter_id} (attempt {attempt}/{retries}): {error}")
+            if attempt < retries:
+                delay = 2 ** (attempt - 1)
+                remaining = ctx.remaining() if ctx else None
+                time.sleep(delay if remaining is None else min(delay, max(0, remaining)))
+        raise Exception(f"Failed to fetch page {page} of Mantis filter {filter_id} after {retries} attempts.")
+
+    def get_tickets_by_ids(self, ticket_ids, concurrency=None, on_ticket=None, fields=None, ctx=None):
+        """
+        Fetch the data of many tickets concurrently.
+
+        Parameters:
+            ticket_ids (list): The ticket IDs to fetch.
+            concurrency (int): Maximum number of in-flight requests. Defaults to the
+                MANTIS_FETCH_CONCURRENCY config value.
+            fields (list): Optional list of issue fields to select; the full issues by default.
+            on_ticket (callable): Called without arguments after every fetched ticket.
+            ctx (RunContext): Optional, run whose deadline bounds every request.
+
+        Returns:
+            list: The issues, in the order of ticket_ids.
+
+        Raises:
+            Exception: If any of the tickets could not be fetched.
+        """
+        concurrency = max(1, concurrency or config.get("MANTIS_FETCH_CONCURRENCY", 4))
+
+        def fetch_issue(ticket_id):
+            ticket_data = self.get_ticket_data(ticket_id, fields, ctx)
+            if not ticket_data or not ticket_data.get("issues"):
+                raise Exception(f"Failed to fetch ticket {ticket_id} from Mantis.")
+            if on_ticket:
+                on_ticket()
+            return ticket_data["issues"][0]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(fetch_issue, ticket_ids))
 
     def update_status_to_fixed(self, ticket_id):
         """
@@ -91,7 +290,7 @@ class MantisOperations:
         """
         update_url = f"{self.mantis_path}/api/rest/issues/{ticket_id}"
         payload = {"resolution": {"name": "Fixed"}}
-        response = requests.patch(update_url, headers=self.headers, json=payload, verify=False)
+        response = self._request("PATCH", update_url, json=payload)
         if response.status_code != 200:
             mantis_logger.error(f'Failed to update status for Ticket ID {ticket_id}: {response.text}')
 
@@ -101,7 +300,7 @@ class MantisOperations:
         """
         tags_url = f"{self.mantis_path}/api/rest/issues/{ticket_number}/tags"
         payload = {"tags": [{"id": tag_id} for tag_id in tag_ids]}
-        response = requests.post(tags_url, headers=self.headers, json=payload, verify=False)
+        response = self._request("POST", tags_url, json=payload)
         if response.status_code != 201:
             mantis_logger.error(f'Error while adding tags to ticket {ticket_number}: {response.text}')
             return False
@@ -114,7 +313,7 @@ class MantisOperations:
         success = True
         for tag_id in tag_ids:
             tag_url = f"{self.mantis_path}/api/rest/issues/{ticket_number}/tags/{tag_id}"
-            response = requests.delete(tag_url, headers=self.headers, verify=False)
+            response = self._request("DELETE", tag_url)
             if response.status_code != 200:
                 mantis_logger.error(f"Error while detaching tag ID {tag_id} from ticket {ticket_number}: {response.text}")
                 success = False
@@ -126,12 +325,16 @@ class MantisOperations:
         Retrieve the value of a custom field from a Mantis issue.
 
         Parameters:
-            issue (dict): The Mantis issue data (expected to include custom fields).
+            issue (dict | IssueRecord): The Mantis issue data (expected to include custom fields),
+                or its record.
             field_name (str): The name of the custom field to retrieve.
 
         Returns:
             str: The value of the custom field, or an empty string if not found or an error occurs.
         """
+        # Records have their custom fields indexed by name
+        if not isinstance(issue, dict):
+            return issue.custom_fields.get(field_name, "")
         try:
             # Check if the issue has custom fields
             if 'custom_fields' in issue:
@@ -139,7 +342,7 @@ class MantisOperations:
                     if custom_field.get('field', {}).get('name') == field_name:
                         return custom_field.get('value', "")
         except Exception as e:
-            mantis_logger.error(f"Error while getting custom field {field_name} from ticket {issue["id"]}")
+            mantis_logger.error(f"Error while getting custom field {field_name} from ticket {issue.get('id')}")
         return ""
 
     
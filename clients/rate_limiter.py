@@ -0,0 +1,77 @@
+import time
+from threading import Lock
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """
+        Thread-safe token bucket: allows bursts of up to `capacity` calls, then `rate` calls per second.
+
+        Parameters:
+            rate (float): Tokens added per second; 0 or None disables the limit.
+            capacity (int): Maximum number of tokens, i.e. the largest burst.
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = Lock()
+
+    def acquire(self):
+        """
+        Take a token, sleeping until one is available.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self.rate:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # Tokens may go negative: each caller reserves its slot and sleeps until it comes
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.rate)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """
+        Hold every caller back for `seconds`, e.g. after the API reported the quota as exhausted,
+        then resume at the base rate.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+class RateLimiterFactory:
+    _limiters = {}
+    _lock = Lock()  # For thread safety
+
+    @staticmethod
+    def get_limiter(name, rate, capacity):
+        """
+        Get a process-wide token bucket, creating it on first use.
+
+        Limiters are keyed by name so every client of the same API shares the same budget.
+        Later calls with other rate/capacity values update the shared limiter.
+
+        Parameters:
+            name (str): Name of the limiter (e.g., sheets).
+            rate (float): Calls per second; 0 or None disables the limit.
+            capacity (int): Largest burst of calls.
+
+        Returns:
+            TokenBucket: The shared limiter.
+        """
+        with RateLimiterFactory._lock:
+            limiter = RateLimiterFactory._limiters.get(name)
+            if limiter is None:
+                limiter = RateLimiterFactory._limiters[name] = TokenBucket(rate, capacity)
+            else:
+                limiter.rate = rate
+                limiter.capacity = max(1, capacity)
+            return limiter
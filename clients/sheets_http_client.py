@@ -0,0 +1,46 @@
+import threading
+from contextlib import contextmanager
+from gspread.http_client import HTTPClient
+
+class DeadlineHTTPClient(HTTPClient):
+    def __init__(self, *args, **kwargs):
+        """
+        gspread HTTP client whose timeout is capped by the deadline of the run making the request.
+
+        gspread only has a client-wide timeout, while one client serves the runs of every sync
+        target at once, so the run is tracked per thread (see for_run).
+        """
+        self._calls = threading.local()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def timeout(self):
+        """
+        Timeout of the next request of the calling thread: the client timeout, capped by the
+        time left to its run.
+
+        Raises:
+            JobCancelled: If the run already went past its deadline.
+        """
+        ctx = getattr(self._calls, "ctx", None)
+        if ctx is None:
+            return self._timeout
+        if self._timeout is None:
+            ctx.check_deadline()
+            return ctx.remaining()
+        return ctx.timeout(self._timeout)
+
+    @timeout.setter
+    def timeout(self, timeout):
+        self._timeout = timeout
+
+    @contextmanager
+    def for_run(self, ctx):
+        """
+        Cap the timeouts of the requests the calling thread makes in the block by the deadline of ctx.
+        """
+        self._calls.ctx = ctx
+        try:
+            yield
+        finally:
+            self._calls.ctx = None
@@ -1,4 +1,5 @@
 import json
+import os
 from threading import Lock
 
 class ConfigurationManager:
@@ -21,6 +22,8 @@ class ConfigurationManager:
         Load configuration from the JSON file.
         """
         try:
+            # Taken before reading, so a write during the read is picked up by reload_if_changed
+            self._loaded_mtime = self._file_mtime()
             with open(self._config_file, "r") as file:
                 return json.load(file)
         except FileNotFoundError:
@@ -47,9 +50,38 @@ class ConfigurationManager:
         """
         self._config_data = self._load_config()
 
+    def reload_if_changed(self):
+        """
+        Reload the configuration if the file changed since it was last read or written here,
+        e.g. by another process of the app.
+
+        Returns:
+            bool: Whether the configuration was reloaded.
+        """
+        if self._file_mtime() == self._loaded_mtime:
+            return False
+        self.reload()
+        return True
+
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(self._config_file)
+        except OSError:
+            return None
+
     def _save_config(self):
         """
         Save the updated configuration back to the file.
         """
         with open(self._config_file, "w") as file:
             json.dump(self._config_data, file, indent=4)
+        self._loaded_mtime = self._file_mtime()
+
+
+class LazyConfiguration:
+    """
+    Module-level stand-in for ConfigurationManager(): the configuration file is only loaded when
+    a value is first read, so the instance can be declared at import time.
+    """
+    def __getattr__(self, name):
+        return getattr(ConfigurationManager(), name)
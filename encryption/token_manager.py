@@ -1,11 +1,14 @@
-from cryptography.fernet import Fernet
-from config.config_manager import ConfigurationManager
+from config.config_manager import LazyConfiguration
 
 # Initialize the configuration manager
-config = ConfigurationManager()
+config = LazyConfiguration()
 
 class TokenManager:
-    def __init__(self, key_file=config.get("KEY_FILE"), token_file=config.get("TOKEN_FILE")):
+    def __init__(self, key_file=None, token_file=None):
+        from cryptography.fernet import Fernet
+
+        key_file = key_file or config.get("KEY_FILE")
+        token_file = token_file or config.get("TOKEN_FILE")
         # Load the encryption key
         with open(key_file, "rb") as kf:
             self.key = kf.read()
@@ -61,6 +61,22 @@ class LoggerSetup:
 
         return logger
 
+    @staticmethod
+    def lazy_logger(name, log_file_base, level=logging.INFO):
+        """
+        Get a logger that is only set up (log directory and file handler created) when it is
+        first used, so importing a module that declares one has no side effects.
+
+        Parameters:
+            name (str): Name of the logger.
+            log_file_base (str): Base path for the log file (e.g., logs/git).
+            level (int): Logging level (e.g., logging.INFO).
+
+        Returns:
+            LazyLogger: Proxy of the configured logger.
+        """
+        return LazyLogger(name, log_file_base, level)
+
     @staticmethod
     def _close_all_handlers():
         """
@@ -74,3 +90,14 @@ class LoggerSetup:
         logging.shutdown()
         if hasattr(os, 'sync'):
             os.sync()
+
+
+class LazyLogger:
+    def __init__(self, name, log_file_base, level=logging.INFO):
+        self._args = (name, log_file_base, level)
+        self._logger = None
+
+    def __getattr__(self, name):
+        if self._logger is None:
+            self._logger = LoggerSetup.setup_logger(*self._args)
+        return getattr(self._logger, name)
@@ -1,7 +1,20 @@
 # main.py
 
-from processors.regression_progress_updater import RegressionProgressUpdater
+import argparse
+from metrics.startup_timer import StartupTimer
 
 if __name__ == "__main__":
+    startup = StartupTimer()
+    arg_parser = argparse.ArgumentParser(description="Sync the Mantis regression filter to Google Sheets.")
+    arg_parser.add_argument("--full", action="store_true", help="Refetch the whole filter instead of only changed issues.")
+    arg_parser.add_argument("--stream", action="store_true", help="Stream the filter to the sheet with bounded memory.")
+    args = arg_parser.parse_args()
+
+    # Imported after parsing so --help does not pay for the clients' imports
+    from processors.regression_progress_updater import RegressionProgressUpdater
+    startup.mark("imports")
+
     updater = RegressionProgressUpdater()
-    updater.update_progress()
+    startup.mark("setup")
+    updater.logger.info(f"Startup took {startup.summary()}")
+    updater.update_progress(full_rebuild=args.full, stream=args.stream)
@@ -0,0 +1,132 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Process-wide counters and latency histograms, rendered in the Prometheus text format.
+        """
+        self._lock = Lock()
+        self._metrics = {}  # name -> {"type", "help", "buckets", "series": {labels: value}}
+
+    def describe(self, name, metric_type, help_text, buckets=DEFAULT_BUCKETS):
+        """
+        Declare a metric ("counter" or "histogram"). Undeclared metrics are created on first use.
+        """
+        with self._lock:
+            self._declare(name, metric_type, help_text, buckets)
+
+    def _declare(self, name, metric_type, help_text="", buckets=DEFAULT_BUCKETS):
+        # Called with the lock held
+        if name not in self._metrics:
+            self._metrics[name] = {"type": metric_type, "help": help_text, "buckets": tuple(buckets), "series": {}}
+        return self._metrics[name]
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Increment a counter.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._declare(name, "counter")["series"]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """
+        Record an observation (e.g., a duration in seconds) in a histogram.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            metric = self._declare(name, "histogram")
+            histogram = metric["series"].get(key)
+            if histogram is None:
+                histogram = metric["series"][key] = {"buckets": [0] * len(metric["buckets"]), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(metric["buckets"]):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Time the enclosed block into a histogram, whether it succeeds or raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def get(self, name, **labels):
+        """
+        Return the value of a counter series, or the observation count of a histogram series.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            metric = self._metrics.get(name)
+            if not metric or key not in metric["series"]:
+                return 0
+            value = metric["series"][key]
+            return value["count"] if metric["type"] == "histogram" else value
+
+    def total(self, name):
+        """
+        Return the sum of a counter over all its label combinations.
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if not metric:
+                return 0
+            if metric["type"] == "histogram":
+                return sum(value["count"] for value in metric["series"].values())
+            return sum(metric["series"].values())
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                metric = self._metrics[name]
+                if metric["help"]:
+                    lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for key in sorted(metric["series"]):
+                    value = metric["series"][key]
+                    if metric["type"] == "counter":
+                        lines.append(f"{name}{self._labels(key)} {value}")
+                        continue
+                    for bound, count in zip(metric["buckets"], value["buckets"]):
+                        lines.append(f"{name}_bucket{self._labels(key + (('le', str(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{self._labels(key + (('le', '+Inf'),))} {value['count']}")
+                    lines.append(f"{name}_sum{self._labels(key)} {value['sum']}")
+                    lines.append(f"{name}_count{self._labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(key):
+        if not key:
+            return ""
+        escaped = (
+            (label, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for label, value in key
+        )
+        return "{" + ",".join(f'{label}="{value}"' for label, value in escaped) + "}"
+
+# Shared registry of the process
+metrics = MetricsRegistry()
+
+metrics.describe("mantis_requests_total", "counter", "Requests sent to the Mantis REST API.")
+metrics.describe("mantis_request_duration_seconds", "histogram", "Latency of Mantis REST API requests.")
+metrics.describe("sheets_requests_total", "counter", "Calls made to the Google Sheets API.")
+metrics.describe("sheets_request_duration_seconds", "histogram", "Latency of Google Sheets API calls.")
+metrics.describe("sheets_throttled_seconds_total", "counter", "Time Google Sheets API calls waited on the rate limiter.")
+metrics.describe("sync_stage_duration_seconds", "histogram", "Duration of each stage of a sync run.")
+metrics.describe("sync_runs_total", "counter", "Sync runs by outcome.")
+metrics.describe("sync_issues_fetched_total", "counter", "Issues received from Mantis by sync runs.")
+metrics.describe("sync_rows_written_total", "counter", "Rows written to the sheet by sync runs.")
@@ -0,0 +1,38 @@
+import time
+
+class StartupTimer:
+    def __init__(self):
+        """
+        Measure the phases of a process startup (imports, setup, ...), from the creation of the timer.
+        """
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = {}
+
+    def mark(self, phase):
+        """
+        End a phase: record the time elapsed since the previous mark (or the start).
+
+        Parameters:
+            phase (str): Name of the phase that just ended (e.g., imports).
+        """
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def report(self):
+        """
+        Returns:
+            dict: Duration of each phase and the total, in seconds.
+        """
+        return {
+            "phases": {phase: round(seconds, 3) for phase, seconds in self.phases.items()},
+            "total_seconds": round(self._last - self.started, 3)
+        }
+
+    def summary(self):
+        """
+        One-line report for the logs, e.g. "0.215s (imports 0.180s, scheduler 0.035s)".
+        """
+        phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases.items())
+        return f"{self._last - self.started:.3f}s ({phases})"
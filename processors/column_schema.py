@@ -0,0 +1,205 @@
+import hashlib
+import json
+from dateutil import parser
+from loggers.logging_config import LoggerSetup
+
+logger = LoggerSetup.lazy_logger("regression_progress", "logs/regression_progress")
+
+# Layout of the regression sheet, overridable with REGRESSION_SHEET_COLUMNS in config.json.
+# Each column reads either a (dotted) path of the Mantis issue ("source"), a custom field
+# ("custom_field") or a value derived from the issue history ("derived"), then applies an
+# optional formatter.
+DEFAULT_COLUMNS = [
+    {"column": "A", "source": "id", "formatter": "ticket_link"},
+    {"column": "B", "source": "category.name"},
+    {"column": "C", "source": "project.name"},
+    {"column": "D", "custom_field": "Record Type"},
+    {"column": "E", "source": "summary"},
+    {"column": "F", "source": "handler.real_name"},
+    {"column": "G", "custom_field": "QA Owner"},
+    {"column": "H", "source": "resolution.label"},
+    {"column": "I", "source": "status.label"},
+    {"column": "J", "source": "priority.label"},
+    {"column": "K", "source": "created_at", "formatter": "date"},
+    {"column": "L", "derived": "fixed_date"},
+    {"column": "M", "derived": "source_changeset"},
+    {"column": "N", "derived": "fixed_by"},
+    {"column": "O", "derived": "root_cause"},
+    {"column": "P", "source": "tags", "formatter": "names"},
+    {"column": "Q", "custom_field": "Faucet"},
+    {"column": "R", "custom_field": "Efforts Dev"}
+]
+
+# Issue paths held as attributes of an IssueRecord, by their path in the Mantis payload;
+# the values of other paths are kept in the record's extra map
+RECORD_PATHS = {
+    "id": "id",
+    "summary": "summary",
+    "category.name": "category",
+    "project.name": "project",
+    "handler.real_name": "handler",
+    "status.label": "status",
+    "resolution.label": "resolution",
+    "priority.label": "priority",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "tags": "tags"
+}
+
+def format_date(date_string):
+    """
+    Format an ISO 8601 Mantis date as MM/DD/YYYY, or return "" if it is empty or invalid.
+    """
+    if not date_string:
+        return ""
+    try:
+        dt = parser.isoparse(date_string)
+        return dt.strftime("%m/%d/%Y")  # Or whatever output format you need
+    except Exception as e:
+        logger.error(f"Date parsing error: {e}")
+        return ""
+
+def format_names(items):
+    """
+    Join the names of a list of Mantis objects (e.g., tags), or of plain names, with commas.
+    """
+    if not items:
+        return ""
+    return ", ".join(item.get('name', '') if isinstance(item, dict) else item for item in items)
+
+def column_index(column):
+    """
+    Convert a column letter (e.g., "A", "AB") to its zero-based index.
+    """
+    index = 0
+    for letter in column.upper():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+def index_custom_fields(issue):
+    """
+    Index the custom fields of an issue by name, in a single pass. Records have them indexed already.
+    """
+    if not isinstance(issue, dict):
+        return issue.custom_fields
+    return {
+        custom_field.get('field', {}).get('name'): custom_field.get('value', "")
+        for custom_field in issue.get('custom_fields', [])
+    }
+
+class ColumnSchema:
+    def __init__(self, columns, mantis_path, derive=None):
+        """
+        Compile a column schema into a row extractor.
+
+        Parameters:
+            columns (list): Column specs, see DEFAULT_COLUMNS.
+            mantis_path (str): Mantis base URL, used by the ticket_link formatter.
+            derive (callable): Called once per issue, returns a dict of derived values
+                (e.g., fixed_date) used by the "derived" columns.
+        """
+        self.columns = columns
+        self.mantis_path = mantis_path
+        self.derive = derive
+        self.formatters = {
+            "date": format_date,
+            "names": format_names,
+            "ticket_link": lambda ticket_id: f'=HYPERLINK("{self.mantis_path}/view.php?id={ticket_id}", "{ticket_id}")'
+        }
+
+        self.width = max(column_index(column["column"]) for column in columns) + 1
+        self.last_column = max((column["column"] for column in columns), key=column_index)
+        self.uses_derived = any("derived" in column for column in columns)
+        self._extractors = [(column_index(column["column"]), self._compile(column)) for column in columns]
+        self._record_extractors = [(column_index(column["column"]), self._compile(column, records=True)) for column in columns]
+
+    def _compile(self, column, records=False):
+        """
+        Build the extractor of a single column: extractor(issue, custom_fields, derived) -> value.
+
+        Parameters:
+            records (bool): Build the extractor for IssueRecords instead of raw Mantis issues.
+        """
+        if "custom_field" in column:
+            name = column["custom_field"]
+            extract = lambda issue, custom_fields, derived: custom_fields.get(name, "")
+        elif "derived" in column:
+            name = column["derived"]
+            extract = lambda issue, custom_fields, derived: derived.get(name, "")
+        elif "source" in column and records:
+            source = column["source"]
+            attribute = RECORD_PATHS.get(source)
+            if attribute:
+                extract = lambda issue, custom_fields, derived: getattr(issue, attribute)
+            else:
+                extract = lambda issue, custom_fields, derived: (issue.extra or {}).get(source, "")
+        elif "source" in column:
+            path = tuple(column["source"].split("."))
+            extract = lambda issue, custom_fields, derived: self._resolve(issue, path)
+        else:
+            raise Exception(f"Column {column['column']} has no source, custom_field or derived value.")
+
+        if column.get("formatter"):
+            if column["formatter"] not in self.formatters:
+                raise Exception(f"Unknown formatter {column['formatter']} for column {column['column']}.")
+            formatter = self.formatters[column["formatter"]]
+            return lambda issue, custom_fields, derived: formatter(extract(issue, custom_fields, derived))
+        return extract
+
+    @staticmethod
+    def _resolve(issue, path):
+        value = issue
+        for key in path:
+            if not isinstance(value, dict):
+                return ""
+            value = value.get(key)
+        return "" if value is None else value
+
+    def build_row(self, issue, custom_fields=None):
+        """
+        Build the sheet row of an issue.
+
+        Parameters:
+            issue (dict | IssueRecord): The Mantis issue or its record.
+            custom_fields (dict): The issue custom fields indexed by name, built if not given.
+        """
+        if custom_fields is None:
+            custom_fields = index_custom_fields(issue)
+        derived = self.derive(issue) if self.uses_derived and self.derive else {}
+        extractors = self._extractors if isinstance(issue, dict) else self._record_extractors
+
+        row = [""] * self.width
+        for index, extract in extractors:
+            row[index] = extract(issue, custom_fields, derived)
+        return row
+
+    def source_fields(self):
+        """
+        Top-level issue fields read by the schema, used to project the Mantis list call.
+        """
+        fields = ["id"]
+        for column in self.columns:
+            if "source" in column:
+                fields.append(column["source"].split(".")[0])
+            elif "custom_field" in column:
+                fields.append("custom_fields")
+        if self.uses_derived:
+            # The history facts depend on the resolution
+            fields += ["resolution", "history"]
+        return list(dict.fromkeys(fields))
+
+    def extra_paths(self):
+        """
+        Source paths read by the schema that are not IssueRecord attributes, to be kept in the
+        records' extra map.
+        """
+        return [
+            column["source"] for column in self.columns
+            if "source" in column and column["source"] not in RECORD_PATHS
+        ]
+
+    def fingerprint(self):
+        """
+        Identify the schema, so rows built with another schema can be detected.
+        """
+        return hashlib.sha1(json.dumps([self.columns, self.mantis_path], sort_keys=True).encode("utf-8")).hexdigest()
@@ -0,0 +1,122 @@
+import os
+import socket
+import threading
+import time
+import uuid
+
+class LeaseCoordinator:
+    def __init__(self, backend, logger, lease_name="scheduler", lease_seconds=15, poll_seconds=1.0,
+                 on_elected=None, on_demoted=None, on_tick=None):
+        """
+        Elect one leader among the processes sharing a state backend, through a renewable lease.
+
+        A background thread renews the lease every poll_seconds; if the leader dies, another
+        process takes over once its lease expired (lease_seconds).
+
+        Parameters:
+            backend (MemoryStateBackend | SqliteStateBackend): Backend holding the lease.
+            logger (Logger): Logger of the app.
+            lease_name (str): Name of the lease.
+            lease_seconds (float): Validity of the lease, i.e. the failover delay.
+            poll_seconds (float): Interval between lease renewals and ticks.
+            on_elected (callable): Called when this process won the lease; it only becomes the
+                leader if the call succeeds, otherwise the lease is released again.
+            on_demoted (callable): Called when this process loses the lease.
+            on_tick (callable): Called as on_tick(is_leader) after every renewal.
+
+        Callback errors are logged, they never stop the renewals.
+        """
+        self.backend = backend
+        self.logger = logger
+        self.lease_name = lease_name
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_tick = on_tick
+        # Unique per process, and readable in the lease table
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._lease_expires = 0.0  # time.monotonic() at which our last renewal runs out
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Take part in the election, from a background thread. The first round runs right away.
+        """
+        self._renew()
+        self._thread = threading.Thread(target=self._loop, name="lease-coordinator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop taking part in the election and release the lease, so another process takes over at once.
+        """
+        self._stop.set()
+        if self.is_leader:
+            self._set_leader(False)
+            self._release()
+
+    def holds_lease(self):
+        """
+        Whether this process is the leader and its last renewal has not run out yet, i.e. no other
+        process can have taken over. Checked by runs before every sheet write.
+        """
+        return self.is_leader and time.monotonic() < self._lease_expires
+
+    def _loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self._renew()
+            except Exception as e:
+                # Keep the renewal thread alive whatever happens, a dead one leaves a stale leader
+                self.logger.error(f"Coordinator round failed: {e}")
+
+    def _renew(self):
+        # Measured before the call, so the local view of the lease never outlives the stored one
+        expires = time.monotonic() + self.lease_seconds
+        try:
+            leader = self.backend.acquire_lease(self.lease_name, self.holder, self.lease_seconds)
+        except Exception as e:
+            # Without a renewed lease another process may take over, so step down
+            self.logger.error(f"Failed to renew the {self.lease_name} lease: {e}")
+            leader = False
+        if leader:
+            self._lease_expires = expires
+        self._set_leader(leader)
+
+        if self.on_tick:
+            try:
+                self.on_tick(self.is_leader)
+            except Exception as e:
+                self.logger.error(f"Coordinator tick failed: {e}")
+
+    def _set_leader(self, leader):
+        if leader == self.is_leader:
+            return
+        if leader:
+            try:
+                if self.on_elected:
+                    self.on_elected()
+            except Exception as e:
+                # Leading half set up is worse than not leading: let another process try
+                self.logger.error(f"{self.holder} won the {self.lease_name} lease but failed to take over: {e}")
+                self._release()
+                return
+            self.is_leader = True
+            self.logger.info(f"{self.holder} holds the {self.lease_name} lease")
+        else:
+            self.is_leader = False
+            self.logger.info(f"{self.holder} lost the {self.lease_name} lease")
+            try:
+                if self.on_demoted:
+                    self.on_demoted()
+            except Exception as e:
+                self.logger.error(f"{self.holder} failed to step down cleanly: {e}")
+
+    def _release(self):
+        try:
+            self.backend.release_lease(self.lease_name, self.holder)
+        except Exception as e:
+            self.logger.error(f"Failed to release the {self.lease_name} lease: {e}")
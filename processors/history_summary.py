@@ -0,0 +1,105 @@
+from loggers.logging_config import LoggerSetup
+from processors.column_schema import format_date
+
+logger = LoggerSetup.lazy_logger("regression_progress", "logs/regression_progress")
+
+# Resolutions for which the ticket counts as fixed and gets a fixed date/user
+FIXED_RESOLUTIONS = frozenset([
+    'Fixed',
+    'For QA',
+    'For Submitter',
+    'Deployable on Hold',
+    'For Product Management'
+])
+
+# Statuses a ticket leaves when it gets fixed
+UNFIXED_STATUSES = frozenset([
+    'New',
+    'Partially Fixed',
+    'Not Fixed',
+    'In Progress',
+    'Investigation in Progress'
+])
+
+class HistorySummary:
+    __slots__ = ("fixed_date", "fixed_by", "source_changeset", "root_cause", "entry_count")
+
+    def __init__(self, fixed_date="", fixed_by="", source_changeset="", root_cause="", entry_count=0):
+        self.fixed_date = fixed_date
+        self.fixed_by = fixed_by
+        self.source_changeset = source_changeset
+        self.root_cause = root_cause
+        self.entry_count = entry_count
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+def needs_history(issue):
+    """
+    Whether the history facts of an issue are worth fetching its history for: only fixed tickets
+    get a fixed date/user (see summarize_history).
+
+    Parameters:
+        issue (dict | IssueRecord): The Mantis issue or its record.
+    """
+    if not isinstance(issue, dict):
+        return issue.resolution in FIXED_RESOLUTIONS
+    return issue.get('resolution', {}).get('label', '') in FIXED_RESOLUTIONS
+
+def summarize_history(issue):
+    """
+    Compute every history based fact of an issue in a single pass over its history.
+
+    - fixed_date / fixed_by: most recent move out of an unfixed status, for fixed tickets only.
+    - source_changeset: "Yes" if a source changeset was ever attached.
+    - root_cause: value of the most recent Root Cause change.
+
+    Parameters:
+        issue (dict | IssueRecord): The Mantis issue, including its history, or its record
+            whose history was summarized when it was built.
+
+    Returns:
+        HistorySummary: The derived facts; empty values where nothing matched.
+    """
+    if not isinstance(issue, dict):
+        return issue.history or HistorySummary()
+
+    summary = HistorySummary()
+    try:
+        history = issue.get('history', [])
+        summary.entry_count = len(history)
+        is_fixed = issue.get('resolution', {}).get('label', '') in FIXED_RESOLUTIONS
+
+        last_status_change = None
+        root_cause_entry = None
+        for entry in history:
+            field = entry.get('field', {})
+            label = field.get('label')
+
+            if is_fixed and label == 'Current Status' \
+                    and entry.get('old_value', {}).get('label', '') in UNFIXED_STATUSES:
+                # Later entries are more recent, keep the last match
+                last_status_change = entry
+            elif label == 'Source_changeset_attached':
+                summary.source_changeset = "Yes"
+
+            if field.get('name') == "Root Cause":
+                # Max by created_at; on ties the earliest entry wins
+                if root_cause_entry is None or entry.get('created_at', '') > root_cause_entry.get('created_at', ''):
+                    root_cause_entry = entry
+
+        if last_status_change is not None:
+            summary.fixed_date = format_date(last_status_change.get('created_at'))
+            summary.fixed_by = last_status_change.get('user', {}).get('real_name', '')
+        if root_cause_entry is not None:
+            summary.root_cause = root_cause_entry.get('new_value', '')
+
+    except Exception as e:
+        logger.error(f"Error summarizing history of ticket {issue.get('id')}: {e}")
+    return summary
+
+def history_values(issue):
+    """
+    Derived values of an issue for the "derived" sheet columns.
+    """
+    return summarize_history(issue).as_dict()
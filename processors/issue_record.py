@@ -0,0 +1,102 @@
+import sys
+from processors.history_summary import HistorySummary, summarize_history
+
+def _label(issue, key, name):
+    value = issue.get(key)
+    if not isinstance(value, dict):
+        return ""
+    # Few distinct labels are shared by thousands of issues, keep a single copy of each
+    return sys.intern(value.get(name) or "")
+
+def resolve_path(issue, path):
+    """
+    Resolve a dotted path (e.g., "handler.real_name") in a raw Mantis issue, or return "".
+    """
+    value = issue
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(key)
+    return "" if value is None else value
+
+class IssueRecord:
+    __slots__ = (
+        "id", "summary", "category", "project", "handler", "status", "resolution", "priority",
+        "created_at", "updated_at", "tags", "custom_fields", "history", "extra"
+    )
+
+    def __init__(self, id, summary="", category="", project="", handler="", status="", resolution="",
+                 priority="", created_at="", updated_at="", tags=(), custom_fields=None, history=None, extra=None):
+        """
+        Compact form of a Mantis issue, holding only what the sync uses.
+
+        Parameters:
+            tags (tuple): Tag names.
+            custom_fields (dict): Custom field values by field name.
+            history (HistorySummary): Facts derived from the issue history, or None if the
+                history was not loaded.
+            extra (dict): Values of other issue paths read by the sheet columns, by path.
+        """
+        self.id = id
+        self.summary = summary
+        self.category = category
+        self.project = project
+        self.handler = handler
+        self.status = status
+        self.resolution = resolution
+        self.priority = priority
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.tags = tags
+        self.custom_fields = custom_fields if custom_fields is not None else {}
+        self.history = history
+        self.extra = extra
+
+    @classmethod
+    def from_issue(cls, issue, extra_paths=()):
+        """
+        Build the record of a raw Mantis issue. The history, if present, is summarized right away.
+
+        Parameters:
+            issue (dict): The Mantis issue.
+            extra_paths (iterable): Other dotted issue paths to keep (see ColumnSchema.extra_paths).
+        """
+        return cls(
+            int(issue["id"]),
+            summary=issue.get("summary") or "",
+            category=_label(issue, "category", "name"),
+            project=_label(issue, "project", "name"),
+            handler=_label(issue, "handler", "real_name"),
+            status=_label(issue, "status", "label"),
+            resolution=_label(issue, "resolution", "label"),
+            priority=_label(issue, "priority", "label"),
+            created_at=issue.get("created_at") or "",
+            updated_at=issue.get("updated_at") or "",
+            tags=tuple(tag.get("name", "") for tag in issue.get("tags") or []),
+            custom_fields={
+                sys.intern(custom_field.get("field", {}).get("name") or ""): custom_field.get("value", "")
+                for custom_field in issue.get("custom_fields") or []
+            },
+            history=summarize_history(issue) if "history" in issue else None,
+            extra={path: resolve_path(issue, path) for path in extra_paths} or None
+        )
+
+    def as_dict(self):
+        """
+        Plain representation of the record, e.g. to store it as JSON.
+        """
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values["tags"] = list(self.tags)
+        values["history"] = self.history.as_dict() if self.history is not None else None
+        return values
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Rebuild a record from its as_dict representation.
+        """
+        values = dict(values)
+        values["tags"] = tuple(values.get("tags") or ())
+        if values.get("history") is not None:
+            values["history"] = HistorySummary(**values["history"])
+        return cls(**values)
@@ -0,0 +1,129 @@
+import threading
+from config.config_manager import ConfigurationManager
+from loggers.logging_config import LoggerSetup
+from processors.run_context import RunContext
+
+class JobExecutor:
+    def __init__(self, job_func, workers=None, lease=None):
+        """
+        Single entry point for starting sync runs, shared by the scheduler and the /trigger endpoint.
+
+        At most one run per target is in progress, and at most `workers` runs (of different
+        targets) execute at the same time; the others wait for a free worker. A trigger arriving
+        during a run is queued and started as soon as the run ends; further triggers are coalesced
+        into the queued one. Each run gets a RunContext carrying its cancellation flag and a
+        deadline of JOB_TIMEOUT_MINUTES, counted from the moment it gets a worker.
+
+        Parameters:
+            job_func (callable): Runs a sync, called as job_func(ctx, **options) in a worker thread.
+            workers (int): Maximum number of runs executing at the same time; defaults to the
+                SYNC_WORKERS config value, read when the first run starts.
+            lease (callable): Optional, returns whether this process may still write the sheets;
+                given to every RunContext (see RunContext.check_lease).
+        """
+        self.job_func = job_func
+        self.logger = LoggerSetup.lazy_logger("flask", "logs/flask")
+        self.workers = workers
+        self.lease = lease
+        self._worker_slots = None
+        self._lock = threading.Lock()
+        self._runs = {}  # target -> RunContext of the run in progress
+        self._queued = {}  # target -> (trigger, options) of the run to start next
+
+    def submit(self, target, trigger, **options):
+        """
+        Start a run of the target, or queue it if one is in progress.
+
+        Options of coalesced triggers are merged, a queued full rebuild stays a full rebuild.
+
+        Parameters:
+            target (str): Name of the sync target.
+            trigger (str): What asks for the run (e.g., scheduled, manual).
+            options: Passed to job_func (e.g., full_rebuild=True).
+
+        Returns:
+            str: "started", "queued" or "coalesced".
+        """
+        with self._lock:
+            if target not in self._runs:
+                self._start(target, trigger, options)
+                return "started"
+            if target not in self._queued:
+                self._queued[target] = (trigger, options)
+                return "queued"
+            queued_options = self._queued[target][1]
+            for key, value in options.items():
+                queued_options[key] = queued_options.get(key) or value
+            return "coalesced"
+
+    def cancel(self, target):
+        """
+        Drop the queued run of the target and ask its run in progress to stop at the next stage boundary.
+
+        Returns:
+            bool: Whether a run was in progress.
+        """
+        with self._lock:
+            self._queued.pop(target, None)
+            ctx = self._runs.get(target)
+        if ctx is None:
+            return False
+        self.logger.info(f"Cancellation requested for the {target} run")
+        ctx.cancel()
+        return True
+
+    def cancel_all(self):
+        """
+        Cancel the queued and in-progress runs of every target.
+
+        Returns:
+            list: Names of the targets that had a run in progress.
+        """
+        with self._lock:
+            targets = list(self._runs)
+            self._queued.clear()
+        return [target for target in targets if self.cancel(target)]
+
+    def state(self, target):
+        """
+        Returns:
+            dict: Whether a run of the target is in progress, waiting for a worker, queued or
+                being cancelled.
+        """
+        with self._lock:
+            ctx = self._runs.get(target)
+            return {
+                'running': bool(ctx and ctx.started),
+                'waiting': bool(ctx and not ctx.started),
+                'queued': target in self._queued,
+                'cancelling': bool(ctx and ctx.cancelled)
+            }
+
+    def _start(self, target, trigger, options):
+        # Called with the lock held
+        if self._worker_slots is None:
+            self.workers = self.workers or ConfigurationManager().get("SYNC_WORKERS", 2)
+            self._worker_slots = threading.BoundedSemaphore(max(1, self.workers))
+        timeout_minutes = ConfigurationManager().get("JOB_TIMEOUT_MINUTES", 60)
+        ctx = RunContext(
+            target, trigger, deadline_seconds=timeout_minutes * 60 if timeout_minutes else None,
+            started=False, lease=self.lease
+        )
+        self._runs[target] = ctx
+        threading.Thread(target=self._run, args=(ctx, options), name=f"sync-{target}", daemon=True).start()
+
+    def _run(self, ctx, options):
+        try:
+            with self._worker_slots:
+                # A run cancelled while waiting for a worker never starts
+                if not ctx.cancelled:
+                    ctx.start()
+                    self.job_func(ctx, **options)
+        except Exception as e:
+            self.logger.error(f"Run of {ctx.target} failed: {e}")
+        finally:
+            with self._lock:
+                del self._runs[ctx.target]
+                queued = self._queued.pop(ctx.target, None)
+                if queued:
+                    self._start(ctx.target, *queued)
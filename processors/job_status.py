@@ -0,0 +1,257 @@
+import time
+from datetime import datetime, timezone
+from threading import Condition
+
+# Share of the progress bar taken by each stage of a run
+STAGE_WEIGHTS = {
+    "fetching": (0, 60),
+    "transforming": (60, 80),
+    "writing": (80, 100),
+    "streaming": (0, 100)
+}
+
+class JobStatus:
+    def __init__(self, lock=None):
+        """
+        Thread-safe status of the sync job, updated by the running job and read by /status.
+
+        Every change bumps a version number and wakes up the threads waiting in wait_for_change,
+        which lets the event stream push updates as they happen.
+
+        Parameters:
+            lock (Condition): Condition shared with other statuses (see JobStatusBoard).
+        """
+        self._lock = lock or Condition()
+        self.version = 0
+        self.running = False
+        self.last_run = None
+        self.last_status = 'Idle'
+        self._reset_progress()
+
+    def _reset_progress(self):
+        self.stage = None
+        self.started_at = None
+        self.stage_started_at = None
+        self.stage_done = 0
+        self.stage_total = None
+        self.pages_fetched = 0
+        self.pages_total = None
+        self.issues_fetched = 0
+        self.rows_transformed = 0
+        self.rows_written = 0
+
+    def start(self):
+        """
+        Mark the start of a run.
+        """
+        with self._lock:
+            self._reset_progress()
+            self.running = True
+            self.started_at = time.monotonic()
+            self.last_status = 'Running'
+            self._changed()
+
+    def finish(self, last_status):
+        """
+        Mark the end of a run with its outcome.
+        """
+        with self._lock:
+            self.running = False
+            self.stage = None
+            self.last_status = last_status
+            self.last_run = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+            self._changed()
+
+    def _changed(self):
+        # Called with the lock held
+        self.version += 1
+        self._lock.notify_all()
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        Block until the status version differs from `version` or the timeout expires.
+
+        Returns:
+            int: The current version.
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def is_running(self):
+        with self._lock:
+            return self.running
+
+    def set_stage(self, stage, total=None):
+        """
+        Enter a stage of the run (e.g., fetching, transforming, writing).
+
+        Parameters:
+            stage (str): Name of the stage.
+            total (int): Number of items (pages, issues or rows) the stage will process, if known.
+        """
+        with self._lock:
+            self.stage = stage
+            self.stage_started_at = time.monotonic()
+            self.stage_done = 0
+            self.stage_total = total
+            self._changed()
+
+    def page_fetched(self, issue_count, pages_total=None):
+        """
+        Record a fetched filter page.
+        """
+        with self._lock:
+            self.pages_fetched += 1
+            self.issues_fetched += issue_count
+            if pages_total:
+                self.pages_total = pages_total
+            # Pages drive the progress of the fetching and streaming stages
+            if self.stage in ("fetching", "streaming") and self.stage_total in (None, self.pages_total):
+                self.stage_total = self.pages_total
+                self.stage_done += 1
+            self._changed()
+
+    def issues_fetched_by_id(self, count=1):
+        """
+        Record issues fetched one by one (e.g., the changed issues of an incremental run).
+        """
+        with self._lock:
+            self.issues_fetched += count
+            self.stage_done += count
+            self._changed()
+
+    def rows_built(self, count=1):
+        with self._lock:
+            self.rows_transformed += count
+            if self.stage == "transforming":
+                self.stage_done += count
+            self._changed()
+
+    def rows_published(self, count):
+        with self._lock:
+            self.rows_written += count
+            if self.stage == "writing":
+                self.stage_done += count
+            self._changed()
+
+    def snapshot(self):
+        """
+        Return a consistent copy of the status, with the overall progress, throughput and ETA.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.started_at if self.started_at is not None and self.running else None
+            stage_elapsed = now - self.stage_started_at if self.stage_started_at is not None else None
+
+            # ETA of the current stage, extrapolated from its own pace
+            eta_seconds = None
+            stage_fraction = None
+            if self.stage_total:
+                stage_fraction = min(self.stage_done / self.stage_total, 1.0)
+                if self.running and self.stage_done and stage_elapsed:
+                    eta_seconds = round((self.stage_total - self.stage_done) * stage_elapsed / self.stage_done, 1)
+
+            if not self.running:
+                progress = 100 if self.last_run else 0
+            else:
+                low, high = STAGE_WEIGHTS.get(self.stage, (0, 0))
+                progress = round(low + (high - low) * (stage_fraction or 0))
+
+            return {
+                'running': self.running,
+                'progress': progress,
+                'last_run': self.last_run,
+                'last_status': self.last_status,
+                'details': {
+                    'stage': self.stage,
+                    'pages_fetched': self.pages_fetched,
+                    'pages_total': self.pages_total,
+                    'issues_fetched': self.issues_fetched,
+                    'rows_transformed': self.rows_transformed,
+                    'rows_written': self.rows_written,
+                    'elapsed_seconds': round(elapsed, 1) if elapsed is not None else None,
+                    'issues_per_sec': round(self.issues_fetched / elapsed, 1) if elapsed else None,
+                    'eta_seconds': eta_seconds
+                }
+            }
+
+class JobStatusBoard:
+    def __init__(self):
+        """
+        Statuses of several sync targets sharing one condition, so a single waiter (e.g., the
+        event stream) is woken up by a change of any of them.
+        """
+        self._lock = Condition()
+        self.statuses = {}
+
+    def get(self, name):
+        """
+        Status of a sync target, created on first use.
+        """
+        with self._lock:
+            if name not in self.statuses:
+                self.statuses[name] = JobStatus(self._lock)
+            return self.statuses[name]
+
+    def version(self):
+        """
+        Sum of the status versions: every change of any status increases it.
+        """
+        with self._lock:
+            return sum(status.version for status in self.statuses.values())
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        Block until the board version differs from `version` or the timeout expires.
+
+        Returns:
+            int: The current version.
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: self.version() != version, timeout)
+            return self.version()
+
+    def snapshot(self, names):
+        """
+        Return a consistent copy of the statuses of the given targets, by target name.
+        """
+        with self._lock:
+            return {name: self.get(name).snapshot() for name in names}
+
+class PublishedStatuses:
+    def __init__(self):
+        """
+        Local copy of the statuses published by the leader process through the state backend.
+
+        A single poller per process refreshes it, and every event stream of the process waits
+        on it instead of reading the backend itself.
+        """
+        self._lock = Condition()
+        self.statuses = []
+        self.version = 0
+
+    def update(self, statuses):
+        """
+        Replace the copy, waking up the waiters if the statuses changed.
+        """
+        with self._lock:
+            if statuses != self.statuses:
+                self.statuses = statuses
+                self.version += 1
+                self._lock.notify_all()
+
+    def get(self):
+        with self._lock:
+            return self.statuses
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        Block until the version differs from `version` or the timeout expires.
+
+        Returns:
+            int: The current version.
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: self.version != version, timeout)
+            return self.version
@@ -1,185 +1,471 @@
 
 from clients.mantis_operations import MantisOperations
 from clients.google_sheets_operations import GoogleSheetsOperations
+from clients.fetch_controller import AdaptiveFetchController
 from config.config_manager import ConfigurationManager
 from loggers.logging_config import LoggerSetup
+from metrics.metrics_registry import metrics
+from processors.column_schema import ColumnSchema, DEFAULT_COLUMNS, format_date
+from processors.history_summary import history_values, needs_history, summarize_history
+from processors.issue_record import IssueRecord
+from processors.job_status import JobStatus
+from processors.run_context import JobCancelled, RunContext
+from processors.row_transform import build_issue_row, transform_issues
+from processors.sheet_diff_writer import SheetDiffWriter
+from processors.streaming_pipeline import StreamingSyncPipeline
+from processors.sync_targets import default_target
+from stores.issue_store import IssueStore
+from contextlib import contextmanager
 from dateutil import parser
+import time
 
 class RegressionProgressUpdater:
-    def __init__(self):
+    def __init__(self, status=None, mantis_ops=None, sheet_ops=None, target=None):
+        """
+        Parameters:
+            status (JobStatus): Status object the run reports its progress to.
+            mantis_ops (MantisOperations): Mantis client to use instead of creating one.
+            sheet_ops (GoogleSheetsOperations): Google Sheets client to use instead of creating one.
+            target (SyncTarget): Filter, sheet and issue store to sync; defaults to the target of
+                the REGRESSION_* config keys.
+        """
+        self.status = status or JobStatus()
         self.logger = LoggerSetup.setup_logger("regression_progress", "logs/regression_progress")
         self.config = ConfigurationManager()
-        self.mantis_ops = MantisOperations()
-        self.sheet_ops = GoogleSheetsOperations(credentials_file=self.config.get("GS_CREDENTIAL_FILE"))
+        self.mantis_ops = mantis_ops or MantisOperations()
+        self.sheet_ops = sheet_ops or GoogleSheetsOperations(credentials_file=self.config.get("GS_CREDENTIAL_FILE"))
         
-        # Sheet details from config.json
-        self.spreadsheet_key = self.config.get("REGRESSION_SHEET_KEY")
-        self.sheet_name = self.config.get("MANTIS_TICKETS_NEXUS_E6")
+        # Filter and sheet details of the target
+        self.target = target or default_target(self.config)
+        self.filter_id = self.target.filter_id
+        self.spreadsheet_key = self.target.sheet_key
+        self.sheet_name = self.target.sheet_name
+
+        # Local copy of the filter and its computed rows, used to only refetch and rebuild what changed
+        self.issue_store = IssueStore(self.target.issue_store_path)
+
+        # Sheet columns, compiled once from the built-in layout or its override in config.json
+        self.row_schema = ColumnSchema(
+            self.config.get("REGRESSION_SHEET_COLUMNS", DEFAULT_COLUMNS),
+            self.mantis_ops.mantis_path,
+            derive=history_values
+        )
+        self.sheet_writer = SheetDiffWriter(self.issue_store, self.logger, last_column=self.row_schema.last_column)
+
+        # Only the fields the sheet uses are requested from Mantis. With LAZY_HISTORY the filter is
+        # listed without histories, which are then fetched only for the issues that need them
+        self.lazy_history = self.config.get("LAZY_HISTORY", False) and self.row_schema.uses_derived
+        self.extra_paths = self.row_schema.extra_paths()
+        self.issue_fields = [
+            field for field in dict.fromkeys(self.row_schema.source_fields() + ["updated_at", "custom_fields"])
+            if not (self.lazy_history and field == "history")
+        ]
+
+        # Figures of the last run, recorded in the run history
+        self.run_stats = {"stage_durations": {}, "issues_fetched": 0, "rows_written": 0, "td_skipped": 0}
+        # Page size and concurrency tuning of the current run's Mantis fetch
+        self.fetch_controller = None
+        # Cancellation and deadline of the current run
+        self.ctx = RunContext()
     
-    def update_progress(self):
-        self.logger.info("Starting Regression Progress Update Process...")
+    def update_progress(self, full_rebuild=False, stream=False, ctx=None):
+        """
+        Sync the regression filter into the Google Sheet.
+
+        Parameters:
+            full_rebuild (bool): Refetch the whole filter instead of only the issues changed since
+                the last successful run. Also forced by setting SYNC_MODE to "full" in config.json.
+            stream (bool): Stream the filter through the bounded-memory pipeline instead of
+                loading it whole. Also forced by setting SYNC_MODE to "stream" in config.json.
+            ctx (RunContext): Cancellation and deadline of the run, checked at every stage boundary
+                and passed to every Mantis and Google Sheets call.
+
+        Raises:
+            JobCancelled: If the run was cancelled or went past its deadline.
+        """
+        self.ctx = ctx or RunContext()
+        self.logger.info(f"Starting Regression Progress Update Process for {self.target.name}...")
 
-        filter_id = self.config.get("REGRESSION_FILTER_ID")
+        filter_id = self.filter_id
         if not filter_id:
             self.logger.error("Filter ID not found in config.")
             return
-        
-        self.logger.info(f"Fetching Mantis tickets using Filter ID: {filter_id}")
-        issues = self.mantis_ops.get_tickets_from_filter(filter_id)
+
+        if stream or self.config.get("SYNC_MODE", "incremental") == "stream":
+            self.stream_progress(filter_id)
+            return
+
+        full_rebuild = full_rebuild or self.config.get("SYNC_MODE", "incremental") == "full"
+        self.logger.info(f"Fetching Mantis tickets using Filter ID: {filter_id} ({'full rebuild' if full_rebuild else 'incremental'})")
+        self.fetch_controller = self.create_fetch_controller()
+        try:
+            with self.timed_stage("fetch"):
+                issues, high_water_mark = self.sync_issue_store(filter_id, full_rebuild)
+        finally:
+            self.save_fetch_tuning()
 
         if not issues:
             self.logger.warning("No issues found with the given filter.")
             return
         
         self.logger.info(f"Total issues fetched: {len(issues)}")
+        metrics.inc("sync_issues_fetched_total", len(issues))
+        self.run_stats["issues_fetched"] = len(issues)
+
+        with self.timed_stage("transform"):
+            processed_rows, td_count = self.build_rows(issues)
+
+        self.run_stats["td_skipped"] = td_count
+        self.logger.info(f"TD Count (Skipped Issues): {td_count}")
+        self.logger.info(f"Processed Issues: {len(processed_rows)}")
+
+        with self.timed_stage("write"):
+            self.write_sheet(processed_rows, td_count, relayout=full_rebuild)
+        # Only a successful publish moves the high-water mark forward, a failed one raised above
+        self.issue_store.set_state("high_water_mark", high_water_mark)
+
+    def stream_progress(self, filter_id):
+        """
+        Sync the filter with the streaming pipeline: pages are transformed and written to the sheet
+        in chunks as they arrive, with bounded queues between the stages. The issue store is not used.
+        """
+        self.logger.info(f"Streaming Mantis tickets using Filter ID: {filter_id}")
+        sheet_id = f"{self.spreadsheet_key}/{self.sheet_name}"
+        clear_to_row = self.sheet_writer.published_last_row(sheet_id)
+
+        self.fetch_controller = self.create_fetch_controller()
+        pipeline = StreamingSyncPipeline(
+            self.mantis_ops,
+            self.row_schema,
+            self.logger,
+            queue_size=self.config.get("STREAM_QUEUE_SIZE", 4),
+            write_chunk_size=self.config.get("STREAM_WRITE_CHUNK_SIZE", 500),
+            status=self.status,
+            fields=self.issue_fields,
+            project=self.project_issue,
+            prepare_page=self.load_histories,
+            controller=self.fetch_controller,
+            ctx=self.ctx
+        )
+
+        # Rows are rewritten in filter order, the remembered layout no longer applies while streaming
+        self.sheet_writer.forget()
+        try:
+            with self.timed_stage("stream"):
+                result = pipeline.run(
+                    filter_id,
+                    lambda: self.sheet_ops.open_worksheet(self.spreadsheet_key, self.sheet_name, self.ctx),
+                    clear_to_row
+                )
+        except Exception as e:
+            self.logger.error(f"Streaming sync failed: {e}")
+            raise
+        finally:
+            self.save_fetch_tuning()
+
+        if not result["issues"]:
+            self.logger.warning("No issues found with the given filter.")
+            return
+
+        self.sheet_writer.remember(sheet_id, result["layout"], result["td_count"])
+        metrics.inc("sync_issues_fetched_total", result["issues"])
+        metrics.inc("sync_rows_written_total", result["rows_written"])
+        self.run_stats.update(
+            issues_fetched=result["issues"],
+            rows_written=result["rows_written"],
+            td_skipped=result["td_count"]
+        )
+        self.logger.info(f"Total issues fetched: {result['issues']}")
+        self.logger.info(f"TD Count (Skipped Issues): {result['td_count']}")
+        self.logger.info(f"Processed Issues: {result['rows_written']}")
+        self.logger.info("Regression Progress Sheet updated successfully.")
+
+    @contextmanager
+    def timed_stage(self, stage):
+        """
+        Time a stage of the run into the stage duration metric and the run statistics. Entering a
+        stage is where a cancelled run stops.
+        """
+        self.ctx.check()
+        start = time.perf_counter()
+        try:
+            with metrics.timer("sync_stage_duration_seconds", stage=stage):
+                yield
+        finally:
+            self.run_stats["stage_durations"][stage] = round(time.perf_counter() - start, 3)
+
+    def create_fetch_controller(self):
+        """
+        Create the AIMD controller tuning the Mantis fetch of this run, starting from the page size
+        chosen by the previous run. Returns None if MANTIS_ADAPTIVE_FETCH is off.
+        """
+        if not self.config.get("MANTIS_ADAPTIVE_FETCH", True):
+            return None
+
+        controller = AdaptiveFetchController(
+            page_size=int(self.issue_store.get_state("adaptive_page_size") or self.config.get("MANTIS_PAGE_SIZE", 50)),
+            concurrency=self.config.get("MANTIS_FETCH_CONCURRENCY", 4),
+            min_page_size=self.config.get("MANTIS_MIN_PAGE_SIZE", 25),
+            max_page_size=self.config.get("MANTIS_MAX_PAGE_SIZE", 500),
+            page_size_step=self.config.get("MANTIS_PAGE_SIZE_STEP", 25),
+            min_concurrency=self.config.get("MANTIS_MIN_CONCURRENCY", 1),
+            max_concurrency=self.config.get("MANTIS_MAX_CONCURRENCY", 8),
+            target_seconds=self.config.get("MANTIS_TARGET_PAGE_SECONDS", 2.0)
+        )
+        self.logger.info(f"Adaptive fetch: page size {controller.page_size}, concurrency {controller.concurrency} "
+                         f"(concurrency {controller.min_concurrency}-{controller.max_concurrency}, "
+                         f"page size {controller.min_page_size}-{controller.max_page_size}, "
+                         f"target {controller.target_seconds}s per page)")
+        return controller
+
+    def save_fetch_tuning(self):
+        """
+        Record the parameters the fetch ran with in the run log and statistics, and keep the
+        page size chosen for the next run.
+        """
+        if not self.fetch_controller:
+            return
+
+        fetch_params = self.fetch_controller.snapshot()
+        fetch_params["next_page_size"] = self.fetch_controller.next_page_size()
+        self.issue_store.set_state("adaptive_page_size", str(fetch_params["next_page_size"]))
+        self.run_stats["fetch_params"] = fetch_params
+        self.logger.info(f"Adaptive fetch parameters: {fetch_params}")
+
+    def sync_issue_store(self, filter_id, full_rebuild=False):
+        """
+        Bring the local issue store up to date with the Mantis filter.
+
+        Returns:
+            tuple: The issues of the filter in filter order, and the new high-water mark.
+        """
+        high_water_mark = self.issue_store.get_state("high_water_mark")
+        same_filter = self.issue_store.get_state("filter_id") == str(filter_id)
+        # Issues stored in another form or with other fields (e.g., another column layout) must be refetched
+        fields_key = "records:" + ",".join(self.issue_fields)
+        same_fields = self.issue_store.get_state("issue_fields") == fields_key
+
+        if full_rebuild or not high_water_mark or not same_filter or not same_fields:
+            self.status.set_stage("fetching")
+            issues = self.load_histories(self.mantis_ops.get_tickets_from_filter(
+                filter_id,
+                fields=self.issue_fields,
+                on_page=self.status.page_fetched,
+                project=self.project_issue,
+                controller=self.fetch_controller,
+                ctx=self.ctx
+            ))
+            self.issue_store.replace_all(issues)
+            self.issue_store.set_state("filter_id", str(filter_id))
+            self.issue_store.set_state("issue_fields", fields_key)
+            return issues, self.get_latest_update([issue.updated_at for issue in issues])
+
+        # List the filter with only the fields needed to detect changes and removals
+        self.status.set_stage("fetching")
+        summaries = self.mantis_ops.get_tickets_from_filter(
+            filter_id, fields=["id", "updated_at"], on_page=self.status.page_fetched, controller=self.fetch_controller,
+            ctx=self.ctx
+        )
+        stored_ids = self.issue_store.get_issue_ids()
+        listed_ids = [int(summary["id"]) for summary in summaries]
+        last_sync = parser.isoparse(high_water_mark)
+
+        changed_ids = [
+            int(summary["id"]) for summary in summaries
+            if int(summary["id"]) not in stored_ids
+            or not summary.get("updated_at")
+            or parser.isoparse(summary["updated_at"]) > last_sync
+        ]
+        removed_ids = stored_ids - set(listed_ids)
+        self.logger.info(f"Incremental sync: {len(changed_ids)} changed, {len(removed_ids)} removed, {len(listed_ids)} listed")
+
+        if changed_ids:
+            self.ctx.check()
+            self.status.set_stage("fetching", total=len(changed_ids))
+            # Each issue is a request of its own anyway, so its history comes along and is dropped if unneeded
+            changed_issues = self.mantis_ops.get_tickets_by_ids(
+                changed_ids,
+                on_ticket=self.status.issues_fetched_by_id,
+                fields=self.issue_fields + (["history"] if self.lazy_history else []),
+                ctx=self.ctx
+            )
+            self.issue_store.upsert_issues(self.load_histories([self.project_issue(issue) for issue in changed_issues]))
+        if removed_ids:
+            self.issue_store.delete_issues(removed_ids)
+
+        latest_update = self.get_latest_update([summary.get("updated_at") for summary in summaries])
+        return self.issue_store.get_issues(listed_ids), latest_update or high_water_mark
+
+    def project_issue(self, issue):
+        """
+        Turn an issue decoded from Mantis into the compact IssueRecord the rest of the sync
+        works on; the raw issue, including its full history, can then be discarded.
+        """
+        return IssueRecord.from_issue(issue, self.extra_paths)
+
+    def load_histories(self, issues):
+        """
+        With LAZY_HISTORY, give the issues that need it (fixed-like resolutions) their history,
+        fetched concurrently, and drop the history of the others, which then get no history
+        facts (fixed date/user, source changeset, root cause). Without LAZY_HISTORY the histories
+        come with the issues and are left as they are.
+
+        Parameters:
+            issues (list): IssueRecords.
+
+        Returns:
+            list: The same issues.
+        """
+        if not self.lazy_history:
+            return issues
+
+        missing = []
+        for issue in issues:
+            if not needs_history(issue):
+                issue.history = None
+            elif issue.history is None:
+                missing.append(issue)
+
+        if missing:
+            self.logger.info(f"Fetching the history of {len(missing)} of {len(issues)} issues")
+        # In batches, so only a batch of raw histories is held before being summarized
+        batch_size = self.config.get("HISTORY_BATCH_SIZE", 200)
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            self.ctx.check()
+            histories = self.mantis_ops.get_tickets_by_ids(
+                [issue.id for issue in batch], fields=["id", "resolution", "history"], ctx=self.ctx
+            )
+            for issue, history in zip(batch, histories):
+                issue.history = summarize_history(history)
+        return issues
+
+    def get_latest_update(self, timestamps):
+        """
+        Return the most recent of the updated_at values, or None.
+        """
+        timestamps = [timestamp for timestamp in timestamps if timestamp]
+        if not timestamps:
+            return None
+        return max(timestamps, key=parser.isoparse)
+
+    def build_rows(self, issues):
+        """
+        Build the sheet rows for the issues, reusing the rows cached in the issue store
+        for issues that did not change since they were computed.
+
+        Returns:
+            tuple: The processed rows and the number of skipped Technical Debt issues.
+        """
+        # Rows built with another column layout are stale
+        schema_fingerprint = self.row_schema.fingerprint()
+        if self.issue_store.get_state("row_schema") != schema_fingerprint:
+            self.issue_store.clear_rows()
+            self.issue_store.set_state("row_schema", schema_fingerprint)
+
+        cached_rows = self.issue_store.get_rows()
+        to_build = [issue for issue in issues if issue.id not in cached_rows]
+        self.status.set_stage("transforming", total=len(issues))
+        self.status.rows_built(len(issues) - len(to_build))
+
+        workers = self.config.get("TRANSFORM_WORKERS", 0)
+        if workers > 1 and len(to_build) >= self.config.get("TRANSFORM_MIN_ISSUES", 2000):
+            self.logger.info(f"Building {len(to_build)} rows on {workers} worker processes")
+            built_rows = transform_issues(
+                to_build,
+                self.row_schema.columns,
+                self.row_schema.mantis_path,
+                workers,
+                chunk_size=self.config.get("TRANSFORM_CHUNK_SIZE", 500),
+                on_chunk=self.status.rows_built
+            )
+        else:
+            built_rows = []
+            for issue in to_build:
+                built_rows.append(self.build_row(issue))
+                self.status.rows_built()
+        computed_rows = {issue.id: row for issue, row in zip(to_build, built_rows)}
 
         processed_rows = []
         td_count = 0
         
         # Process each issue
         for issue in issues:
-            faucet = self.mantis_ops.get_faucet(issue)
-            record_type = self.mantis_ops.get_record_type(issue)
+            issue_id = issue.id
+            row_data = cached_rows[issue_id] if issue_id in cached_rows else computed_rows[issue_id]
 
-            # Skip Technical Debt issues unless Code Move
-            if faucet == "Technical Debt." and record_type != "Code Move":
+            if row_data is None:
                 td_count += 1
                 continue
-            
-            fixed_date, fixed_by = self.get_most_recent_status_change_date_and_user(issue)
-
-            row_data = [
-                f'=HYPERLINK("{self.mantis_ops.get_ticket_url(issue["id"])}", "{issue["id"]}")',
-                issue.get('category', {}).get('name', ''),
-                issue.get('project', {}).get('name', ''),
-                record_type,
-                issue.get('summary', ''),
-                issue.get('handler', {}).get('real_name', ''),
-                self.mantis_ops.get_qa_owner(issue),
-                issue.get('resolution', {}).get('label', ''),
-                issue.get('status', {}).get('label', ''),
-                issue.get('priority', {}).get('label', ''),
-                self.format_date(issue.get('created_at')),
-                fixed_date,
-                self.has_source_changeset(issue),
-                fixed_by,
-                self.get_most_recent_root_cause(issue),
-                self.get_tags(issue),
-                faucet,
-                self.mantis_ops.get_efforts_dev(issue)
-            ]
-            
+
             processed_rows.append(row_data)
 
-        self.logger.info(f"TD Count (Skipped Issues): {td_count}")
-        self.logger.info(f"Processed Issues: {len(processed_rows)}")
+        if computed_rows:
+            self.issue_store.save_rows(computed_rows)
+        self.logger.info(f"Rows computed: {len(computed_rows)}, reused from issue store: {len(issues) - len(computed_rows)}")
+
+        return processed_rows, td_count
+
+    def build_row(self, issue):
+        """
+        Build the sheet row for a single issue.
+
+        Returns:
+            list: The row, or None if the issue is Technical Debt and is skipped from the sheet.
+        """
+        return build_issue_row(self.row_schema, issue)
+
+    def write_sheet(self, processed_rows, td_count, relayout=False):
+        """
+        Publish the processed rows and the TD count to the regression sheet, writing only
+        the rows that changed since the last publish.
 
+        Parameters:
+            relayout (bool): Rewrite the rows in filter order instead of keeping their positions.
+
+        Returns:
+            bool: True once the sheet was updated.
+
+        Raises:
+            Exception: If the sheet could not be updated, so the run is recorded as failed.
+        """
         # Update Google Sheet
         try:
             self.logger.info(f"Updating Google Sheet: {self.spreadsheet_key}, Sheet Name: {self.sheet_name}")
+            self.status.set_stage("writing")
 
-            sheet = self.sheet_ops.client.open_by_key(self.spreadsheet_key).worksheet(self.sheet_name)
-            
-            # Clear old data (A3:R2000)
-            sheet.batch_clear(["A3:R2000"])
-            
-            # Prepare and insert rows starting at row 3
-            cell_range = f"A3:R{3 + len(processed_rows) - 1}"
-            if processed_rows:
-                # sheet.update(cell_range, processed_rows)
-                sheet.update(cell_range, processed_rows, value_input_option='USER_ENTERED')
+            rows_written = self.sheet_writer.write(
+                lambda: self.sheet_ops.open_worksheet(self.spreadsheet_key, self.sheet_name, self.ctx),
+                f"{self.spreadsheet_key}/{self.sheet_name}",
+                processed_rows,
+                td_count,
+                relayout=relayout
+            )
 
-            # Update TD count in G1
-            sheet.update_acell("G1", td_count)
+            self.status.rows_published(rows_written)
+            metrics.inc("sync_rows_written_total", rows_written)
+            self.run_stats["rows_written"] = rows_written
+            self.logger.info(f"Regression Progress Sheet updated successfully ({rows_written} rows written).")
+            return True
 
-            self.logger.info("Regression Progress Sheet updated successfully.")
-        
+        except JobCancelled:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to update Google Sheet: {e}")
+            raise Exception(f"Failed to update Google Sheet: {e}")
 
     def format_date(self, date_string):
-        if not date_string:
-            return ""
-        try:
-            dt = parser.isoparse(date_string)
-            return dt.strftime("%m/%d/%Y")  # Or whatever output format you need
-        except Exception as e:
-            self.logger.error(f"Date parsing error: {e}")
-            return ""
+        return format_date(date_string)
 
     def get_most_recent_status_change_date_and_user(self, issue):
-        try:
-            resolution_label = issue.get('resolution', {}).get('label', '')
-            
-            if resolution_label not in [
-                'Fixed',
-                'For QA',
-                'For Submitter',
-                'Deployable on Hold',
-                'For Product Management'
-            ]:
-                return "", ""
-
-            # Reverse iterate over history to get the most recent entry first
-            for history in reversed(issue.get('history', [])):
-                field = history.get('field', {})
-                
-                if field.get('label') == 'Current Status':
-                    old_value_label = history.get('old_value', {}).get('label', '')
-                    
-                    if old_value_label in [
-                        'New',
-                        'Partially Fixed',
-                        'Not Fixed',
-                        'In Progress',
-                        'Investigation in Progress'
-                    ]:
-                        fixed_date = self.format_date(history.get('created_at'))
-                        fixed_by = history.get('user', {}).get('real_name', '')
-                        return fixed_date, fixed_by
-
-            # No matching history found
-            return "", ""
-
-        except Exception as e:
-            self.logger.error(f"Error extracting most recent status change date/user: {e}")
-            return "", ""
-
+        summary = summarize_history(issue)
+        return summary.fixed_date, summary.fixed_by
 
     def has_source_changeset(self, issue):
-        try:
-            for history in issue.get('history', []):
-                field = history.get('field', {})
-                if field.get('label') == 'Source_changeset_attached':
-                    return "Yes"
-        except Exception as e:
-            self.logger.error(f"Error checking source changeset: {e}")
-        return ""
+        return summarize_history(issue).source_changeset
 
     def get_most_recent_root_cause(self, issue):
-        try:
-            history_entries = [
-                entry for entry in issue.get('history', [])
-                if entry.get('field', {}).get('name') == "Root Cause"
-            ]
-
-            if not history_entries:
-                return ""
-
-            # Sort by created_at descending
-            sorted_entries = sorted(
-                history_entries,
-                key=lambda x: x.get('created_at', ''),
-                reverse=True
-            )
-
-            # Return the most recent 'new_value'
-            return sorted_entries[0].get('new_value', '')
-        
-        except Exception as e:
-            self.logger.error(f"Error fetching most recent root cause: {e}")
-            return ""
-
+        return summarize_history(issue).root_cause
 
     def get_tags(self, issue):
         try:
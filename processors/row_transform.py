@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+from processors.column_schema import ColumnSchema, index_custom_fields
+from processors.history_summary import history_values
+
+# Column schema of a pool worker, compiled once per process by _init_worker
+_worker_schema = None
+
+def build_issue_row(row_schema, issue):
+    """
+    Build the sheet row for a single issue.
+
+    Returns:
+        list: The row, or None if the issue is Technical Debt and is skipped from the sheet.
+    """
+    custom_fields = index_custom_fields(issue)
+    faucet = custom_fields.get("Faucet", "")
+    record_type = custom_fields.get("Record Type", "")
+
+    # Skip Technical Debt issues unless Code Move
+    if faucet == "Technical Debt." and record_type != "Code Move":
+        return None
+
+    return row_schema.build_row(issue, custom_fields)
+
+def _init_worker(columns, mantis_path):
+    global _worker_schema
+    _worker_schema = ColumnSchema(columns, mantis_path, derive=history_values)
+
+def _build_chunk(issues):
+    return [build_issue_row(_worker_schema, issue) for issue in issues]
+
+def transform_issues(issues, columns, mantis_path, workers, chunk_size=500, on_chunk=None):
+    """
+    Build the rows of many issues on a process pool.
+
+    The issues are split into chunks of chunk_size, each chunk is transformed by a worker and
+    the results are merged back in the original order, so the output is the same as a serial run.
+
+    Parameters:
+        issues (list): The Mantis issues.
+        columns (list): Column specs of the sheet (see DEFAULT_COLUMNS).
+        mantis_path (str): Mantis base URL.
+        workers (int): Number of worker processes.
+        chunk_size (int): Number of issues sent to a worker at once.
+        on_chunk (callable): Called with the number of issues of every transformed chunk.
+
+    Returns:
+        list: One row (or None for skipped issues) per issue, in the order of issues.
+    """
+    chunks = [issues[i:i + chunk_size] for i in range(0, len(issues), chunk_size)]
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(columns, mantis_path)) as executor:
+        for chunk_rows in executor.map(_build_chunk, chunks):
+            rows.extend(chunk_rows)
+            if on_chunk:
+                on_chunk(len(chunk_rows))
+    return rows
@@ -0,0 +1,125 @@
+import time
+from threading import Event, Lock
+
+class JobCancelled(Exception):
+    """
+    Raised to stop a run that was cancelled or went past its deadline.
+    """
+
+class RunContext:
+    def __init__(self, target="default", trigger="manual", deadline_seconds=None, started=True, lease=None):
+        """
+        Cancellation flag and deadline of a single run, passed explicitly to every stage and
+        client call of the run.
+
+        Cancellation is cooperative: the run checks it at stage boundaries (see check), so it
+        never stops halfway through writing the sheet. The deadline is also enforced on every
+        HTTP call, whose timeouts are capped by the time left (see timeout).
+
+        Parameters:
+            target (str): Name of the sync target the run belongs to.
+            trigger (str): What started the run (e.g., scheduled, manual).
+            deadline_seconds (float): Maximum duration of the run; None for no deadline.
+            started (bool): Whether the run starts now; otherwise the deadline only runs from start().
+            lease (callable): Optional, returns whether the process may still write the sheets
+                (it holds the scheduler lease). Unlike a cancellation, losing it stops the run
+                before its next Sheets call, even halfway through a write (see check_lease).
+        """
+        self.target = target
+        self.trigger = trigger
+        self.deadline_seconds = deadline_seconds
+        self.deadline = None
+        self.started = False
+        self.lease = lease
+        # Calls made to each external API on behalf of this run, see count_call
+        self.api_calls = {}
+        self._calls_lock = Lock()
+        self._cancelled = Event()
+        if started:
+            self.start()
+
+    def start(self):
+        """
+        Start the deadline clock, e.g. once a run waiting for a worker actually starts.
+        """
+        self.started = True
+        self.deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds else None
+
+    def cancel(self):
+        """
+        Ask the run to stop at its next stage boundary.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def count_call(self, api):
+        """
+        Record a call made to an external API (e.g., mantis, sheets) on behalf of the run. Unlike
+        the process-wide metrics, the count only covers this run when several targets sync at once.
+        """
+        with self._calls_lock:
+            self.api_calls[api] = self.api_calls.get(api, 0) + 1
+
+    def remaining(self):
+        """
+        Seconds left before the deadline, or None if the run has none.
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def check_deadline(self):
+        """
+        Raises:
+            JobCancelled: If the run went past its deadline.
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise JobCancelled(f"Run exceeded its deadline of {self.deadline_seconds:g}s.")
+
+    def check_lease(self):
+        """
+        Raises:
+            JobCancelled: If the process lost the scheduler lease, another one may be running this target.
+        """
+        if self.lease and not self.lease():
+            raise JobCancelled("Run lost the scheduler lease.")
+
+    def check(self):
+        """
+        Stage boundary: stop the run here if it was cancelled or went past its deadline.
+
+        Raises:
+            JobCancelled: If the run must stop.
+        """
+        if self.cancelled:
+            raise JobCancelled("Run cancelled.")
+        self.check_deadline()
+        self.check_lease()
+
+    def timeout(self, timeout):
+        """
+        Cap an HTTP timeout (seconds, or a (connect, read) tuple) by the time left before the deadline.
+
+        Raises:
+            JobCancelled: If the run already went past its deadline.
+        """
+        self.check_deadline()
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if isinstance(timeout, tuple):
+            return tuple(min(value, remaining) for value in timeout)
+        return min(timeout, remaining)
+
+    def checked(self, iterable):
+        """
+        Iterate, checking the deadline before each item (e.g., the chunks of a streamed response,
+        whose read timeout only bounds each read).
+        """
+        for item in iterable:
+            self.check_deadline()
+            yield item
@@ -0,0 +1,183 @@
+import hashlib
+import json
+
+class SheetDiffWriter:
+    def __init__(self, issue_store, logger, first_row=3, last_column="R", clear_limit=2000):
+        """
+        Publish rows to a worksheet by writing only the rows that changed since the last publish.
+
+        The layout of the last publish (ticket ID and content hash per sheet row) is remembered in
+        the issue store, so no read from the sheet is needed to compute the diff.
+
+        Parameters:
+            issue_store (IssueStore): Store used to remember the published layout.
+            logger (Logger): Logger of the calling processor.
+            first_row (int): First sheet row holding ticket data.
+            last_column (str): Last column of the ticket rows.
+            clear_limit (int): Last sheet row cleared when the published layout is unknown.
+        """
+        self.issue_store = issue_store
+        self.logger = logger
+        self.first_row = first_row
+        self.last_column = last_column
+        self.clear_limit = clear_limit
+
+    def write(self, open_sheet, sheet_id, rows, td_count, relayout=False):
+        """
+        Publish the rows and the TD count.
+
+        Rows already on the sheet keep their position, changed rows are rewritten in place, new
+        tickets take the slots freed by removed ones (or are appended) and the freed tail is cleared.
+
+        Parameters:
+            open_sheet (callable): Returns the target worksheet; only called if something changed.
+            sheet_id (str): Identifies the target sheet, the remembered layout is only used for it.
+            rows (list): The rows to publish; the first cell of each row identifies its ticket.
+            td_count (int): Value written to G1.
+            relayout (bool): Lay the rows out in the given order instead of keeping positions.
+
+        Returns:
+            int: The number of rows written, 0 if the sheet was already up to date.
+        """
+        published = self.published_layout(sheet_id)
+
+        keyed_rows = [(self.row_key(row), self.row_hash(row), row) for row in rows]
+        if published and not relayout:
+            layout = self.stable_layout(published["rows"], keyed_rows)
+        else:
+            layout = keyed_rows
+
+        fingerprint = self.fingerprint([[key, row_hash] for key, row_hash, _ in layout], td_count)
+        if published and published.get("fingerprint") == fingerprint:
+            self.logger.info("Sheet content unchanged, skipping the write.")
+            return 0
+
+        old_rows = published["rows"] if published else []
+        updates = self.changed_ranges(old_rows, layout, whole=published is None)
+        if not published or published.get("td_count") != td_count:
+            updates.append({"range": "G1", "values": [[td_count]]})
+
+        # Clear the rows left over below the new layout
+        old_length = len(old_rows) if published else self.clear_limit - self.first_row + 1
+        clear_range = None
+        if old_length > len(layout):
+            clear_range = (f"A{self.first_row + len(layout)}:"
+                           f"{self.last_column}{self.first_row + old_length - 1}")
+
+        rows_written = sum(len(update["values"]) for update in updates if update["range"] != "G1")
+        self.logger.info(f"Writing {rows_written} changed rows in {len(updates)} ranges"
+                         f"{f', clearing {clear_range}' if clear_range else ''}.")
+
+        # Forget the layout while writing, a partial write must lead to a full write next time
+        self.forget()
+        sheet = open_sheet()
+        if updates:
+            sheet.batch_update(updates, value_input_option='USER_ENTERED')
+        if clear_range:
+            sheet.batch_clear([clear_range])
+
+        self.remember(sheet_id, [[key, row_hash] for key, row_hash, _ in layout], td_count)
+        return rows_written
+
+    def published_layout(self, sheet_id):
+        """
+        Return the remembered layout of the last publish to sheet_id, or None if unknown.
+        """
+        published = json.loads(self.issue_store.get_state("published_layout") or "null")
+        if published and published.get("sheet_id") != sheet_id:
+            return None
+        return published
+
+    def published_last_row(self, sheet_id):
+        """
+        Return the last sheet row that may hold ticket data from a previous publish.
+        """
+        published = self.published_layout(sheet_id)
+        if published is None:
+            return self.clear_limit
+        return self.first_row + len(published["rows"]) - 1
+
+    def remember(self, sheet_id, layout, td_count):
+        """
+        Remember a published layout, given as [ticket key, row hash] pairs in sheet order.
+        """
+        self.issue_store.set_state("published_layout", json.dumps({
+            "sheet_id": sheet_id,
+            "fingerprint": self.fingerprint(layout, td_count),
+            "td_count": td_count,
+            "rows": layout
+        }))
+
+    def forget(self):
+        """
+        Forget the published layout, the next write rewrites every row.
+        """
+        self.issue_store.set_state("published_layout", None)
+
+    def fingerprint(self, layout, td_count):
+        return self.row_hash(layout + [td_count])
+
+    def stable_layout(self, published_rows, keyed_rows):
+        """
+        Place the rows so that tickets already on the sheet keep their position.
+        """
+        new_keys = {key for key, _, _ in keyed_rows}
+        by_key = {keyed_row[0]: keyed_row for keyed_row in keyed_rows}
+        published_keys = {key for key, _ in published_rows}
+
+        layout = [by_key.get(key) if key in new_keys else None for key, _ in published_rows]
+        inserted = [keyed_row for keyed_row in keyed_rows if keyed_row[0] not in published_keys]
+
+        # New tickets fill the slots freed by removed tickets first, then go to the end
+        holes = [position for position, keyed_row in enumerate(layout) if keyed_row is None]
+        for position in holes:
+            if not inserted:
+                break
+            layout[position] = inserted.pop(0)
+        layout.extend(inserted)
+
+        # Move the last rows up into the remaining holes so the block stays contiguous
+        holes = [position for position, keyed_row in enumerate(layout) if keyed_row is None]
+        for position in holes:
+            while layout and layout[-1] is None:
+                layout.pop()
+            if position >= len(layout):
+                break
+            layout[position] = layout.pop()
+        while layout and layout[-1] is None:
+            layout.pop()
+
+        return layout
+
+    def changed_ranges(self, old_rows, layout, whole=False):
+        """
+        Group the positions whose content differs from the published layout into contiguous ranges.
+        """
+        updates = []
+        block_start = None
+        block_values = []
+        for position, (key, row_hash, row) in enumerate(layout):
+            old = old_rows[position] if position < len(old_rows) else None
+            if whole or old != [key, row_hash]:
+                if block_start is None:
+                    block_start = position
+                block_values.append(row)
+                continue
+            if block_start is not None:
+                updates.append(self._range_update(block_start, block_values))
+                block_start, block_values = None, []
+        if block_start is not None:
+            updates.append(self._range_update(block_start, block_values))
+        return updates
+
+    def _range_update(self, start, values):
+        first = self.first_row + start
+        return {"range": f"A{first}:{self.last_column}{first + len(values) - 1}", "values": values}
+
+    @staticmethod
+    def row_key(row):
+        return str(row[0])
+
+    @staticmethod
+    def row_hash(row):
+        return hashlib.sha1(json.dumps(row, default=str).encode("utf-8")).hexdigest()
@@ -0,0 +1,212 @@
+import queue
+import threading
+from processors.job_status import JobStatus
+from processors.row_transform import build_issue_row
+from processors.sheet_diff_writer import SheetDiffWriter
+
+# Marks the end of a stage's output
+_END = object()
+
+class _StageFailure:
+    def __init__(self, error):
+        self.error = error
+
+class StreamingSyncPipeline:
+    def __init__(self, mantis_ops, row_schema, logger, queue_size=4, write_chunk_size=500, first_row=3, status=None,
+                 fields=None, project=None, prepare_page=None, controller=None, ctx=None):
+        """
+        Fetch -> transform -> write pipeline with bounded memory.
+
+        Pages flow from Mantis through a bounded queue into the row transformer, and rows are
+        flushed to the sheet in chunks through a second bounded queue, so fetching, transforming
+        and writing overlap and only a few pages/chunks are held in memory at any time.
+
+        Parameters:
+            mantis_ops (MantisOperations): Client used to page through the filter.
+            row_schema (ColumnSchema): Compiled column schema of the sheet.
+            logger (Logger): Logger of the calling processor.
+            queue_size (int): Maximum number of pages, and of row chunks, waiting between stages.
+            write_chunk_size (int): Number of rows written to the sheet per update call.
+            first_row (int): First sheet row holding ticket data.
+            status (JobStatus): Status object the stages report their progress to.
+            fields (list): Optional list of issue fields to select from Mantis.
+            project (callable): Optional, maps each issue decoded from Mantis to the record kept for it.
+            prepare_page (callable): Called by the fetch stage with the issues of every page,
+                returns the issues to transform (e.g., with their histories loaded).
+            controller (AdaptiveFetchController): Optional, tunes the Mantis page size and concurrency.
+            ctx (RunContext): Optional, run whose deadline bounds the Mantis requests. A cancelled
+                run stops between pages, leaving the rows streamed so far in the sheet.
+        """
+        self.mantis_ops = mantis_ops
+        self.row_schema = row_schema
+        self.logger = logger
+        self.queue_size = queue_size
+        self.write_chunk_size = write_chunk_size
+        self.first_row = first_row
+        self.status = status or JobStatus()
+        self.fields = fields
+        self.project = project
+        self.prepare_page = prepare_page
+        self.controller = controller
+        self.ctx = ctx
+
+    def run(self, filter_id, open_sheet, clear_to_row):
+        """
+        Stream the filter into the sheet.
+
+        Parameters:
+            filter_id (str): The Mantis filter ID.
+            open_sheet (callable): Returns the target worksheet.
+            clear_to_row (int): Last row that may hold data from a previous publish; rows below
+                the new data are cleared up to it.
+
+        Returns:
+            dict: issues (count), rows_written, td_count and layout ([ticket key, row hash] per row).
+        """
+        stop = threading.Event()
+        page_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        writer_state = {"sheet": None, "rows_written": 0, "error": None}
+
+        fetcher = threading.Thread(target=self._fetch, args=(filter_id, page_queue, stop), daemon=True)
+        writer = threading.Thread(target=self._write, args=(open_sheet, write_queue, writer_state, stop), daemon=True)
+        self.status.set_stage("streaming")
+        fetcher.start()
+        writer.start()
+
+        issue_count = 0
+        td_count = 0
+        layout = []
+        chunk = []
+        try:
+            while True:
+                try:
+                    page = page_queue.get(timeout=0.5)
+                except queue.Empty:
+                    # The fetcher may be gone without a word if the writer failed
+                    self._check_stopped(stop, writer_state)
+                    continue
+                if page is _END:
+                    break
+                if isinstance(page, _StageFailure):
+                    raise page.error
+                if self.ctx:
+                    self.ctx.check()
+
+                for issue in page:
+                    issue_count += 1
+                    row = build_issue_row(self.row_schema, issue)
+                    self.status.rows_built()
+                    if row is None:
+                        td_count += 1
+                        continue
+                    layout.append([SheetDiffWriter.row_key(row), SheetDiffWriter.row_hash(row)])
+                    chunk.append(row)
+                    if len(chunk) >= self.write_chunk_size:
+                        self._put(write_queue, chunk, stop, writer_state)
+                        chunk = []
+
+            if chunk:
+                self._put(write_queue, chunk, stop, writer_state)
+            self._put(write_queue, _END, stop, writer_state)
+            writer.join()
+            if writer_state["error"]:
+                raise writer_state["error"]
+        except BaseException:
+            stop.set()
+            raise
+
+        if issue_count:
+            sheet = writer_state["sheet"] or open_sheet()
+            # Clear what is left of the previous publish below the new rows
+            next_row = self.first_row + len(layout)
+            if clear_to_row >= next_row:
+                sheet.batch_clear([f"A{next_row}:{self.row_schema.last_column}{clear_to_row}"])
+            sheet.update_acell("G1", td_count)
+
+        return {
+            "issues": issue_count,
+            "rows_written": writer_state["rows_written"],
+            "td_count": td_count,
+            "layout": layout
+        }
+
+    def _fetch(self, filter_id, page_queue, stop):
+        pages = self.mantis_ops.iter_filter_pages(
+            filter_id,
+            fields=self.fields,
+            on_page=self.status.page_fetched,
+            project=self.project,
+            controller=self.controller,
+            ctx=self.ctx
+        )
+        try:
+            for page in pages:
+                if self.prepare_page:
+                    page = self.prepare_page(page)
+                if not self._put(page_queue, page, stop):
+                    break
+            else:
+                self._put(page_queue, _END, stop)
+        except Exception as e:
+            self._put(page_queue, _StageFailure(e), stop)
+        finally:
+            pages.close()
+            if stop.is_set():
+                # Still tell the consumer the fetch is over, without waiting for room
+                try:
+                    page_queue.put_nowait(_END)
+                except queue.Full:
+                    pass
+
+    def _write(self, open_sheet, write_queue, writer_state, stop):
+        try:
+            while not stop.is_set():
+                try:
+                    rows = write_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if rows is _END:
+                    return
+
+                if writer_state["sheet"] is None:
+                    writer_state["sheet"] = open_sheet()
+                first = self.first_row + writer_state["rows_written"]
+                cell_range = f"A{first}:{self.row_schema.last_column}{first + len(rows) - 1}"
+                writer_state["sheet"].update(cell_range, rows, value_input_option='USER_ENTERED')
+                writer_state["rows_written"] += len(rows)
+                self.status.rows_published(len(rows))
+                self.logger.info(f"Streamed {writer_state['rows_written']} rows to the sheet")
+        except Exception as e:
+            writer_state["error"] = e
+            stop.set()
+
+    def _check_stopped(self, stop, writer_state):
+        """
+        Raise the failure that stopped the pipeline, or JobCancelled if the run was cancelled
+        or is past its deadline.
+        """
+        if writer_state["error"]:
+            raise writer_state["error"]
+        if stop.is_set():
+            raise Exception("Streaming pipeline stopped.")
+        if self.ctx:
+            self.ctx.check()
+
+    @staticmethod
+    def _put(target_queue, item, stop, writer_state=None):
+        """
+        Put an item on a bounded queue, giving up if the pipeline is stopped.
+
+        Returns:
+            bool: True if the item was queued.
+        """
+        while not stop.is_set():
+            try:
+                target_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        if writer_state and writer_state["error"]:
+            raise writer_state["error"]
+        return False
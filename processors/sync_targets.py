@@ -0,0 +1,86 @@
+import os
+import re
+
+class SyncTarget:
+    def __init__(self, name, filter_id, sheet_key, sheet_name, interval_minutes=60, issue_store_path="data/issue_store.db"):
+        """
+        A Mantis filter synced into a worksheet, on its own schedule and with its own issue store.
+
+        Parameters:
+            name (str): Unique name of the target (e.g., the release train).
+            filter_id (str): The Mantis filter ID.
+            sheet_key (str): Key of the Google spreadsheet.
+            sheet_name (str): Name of the worksheet the filter is written to.
+            interval_minutes (int): Minutes between scheduled runs.
+            issue_store_path (str): SQLite file of the target's issue store.
+        """
+        self.name = name
+        self.filter_id = filter_id
+        self.sheet_key = sheet_key
+        self.sheet_name = sheet_name
+        self.interval_minutes = interval_minutes
+        self.issue_store_path = issue_store_path
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "filter_id": self.filter_id,
+            "sheet_key": self.sheet_key,
+            "sheet_name": self.sheet_name,
+            "interval_minutes": self.interval_minutes
+        }
+
+# Name of the target used when SYNC_TARGETS is not set, and of the runs recorded before targets existed
+DEFAULT_TARGET_NAME = "regression"
+
+def default_target(config):
+    """
+    The single target described by the REGRESSION_FILTER_ID, REGRESSION_SHEET_KEY and
+    MANTIS_TICKETS_NEXUS_E6 keys, used when SYNC_TARGETS is not set.
+    """
+    return SyncTarget(
+        DEFAULT_TARGET_NAME,
+        config.get("REGRESSION_FILTER_ID"),
+        config.get("REGRESSION_SHEET_KEY"),
+        config.get("MANTIS_TICKETS_NEXUS_E6"),
+        interval_minutes=config.get("JOB_INTERVAL_MINUTES", 60),
+        issue_store_path=config.get("ISSUE_STORE_PATH", "data/issue_store.db")
+    )
+
+def load_sync_targets(config):
+    """
+    Read the sync targets from SYNC_TARGETS in config.json, a list of objects with the keys
+    name, filter_id, sheet_key, sheet_name and optionally interval_minutes (defaults to
+    JOB_INTERVAL_MINUTES) and issue_store_path (defaults to ISSUE_STORE_PATH suffixed with the
+    target name). Without SYNC_TARGETS, the single target of the REGRESSION_* keys is returned.
+
+    Returns:
+        list: SyncTargets, in config order.
+
+    Raises:
+        Exception: If a target misses a key or two targets share a name.
+    """
+    entries = config.get("SYNC_TARGETS")
+    if not entries:
+        return [default_target(config)]
+
+    base_path, extension = os.path.splitext(config.get("ISSUE_STORE_PATH", "data/issue_store.db"))
+    targets = []
+    for entry in entries:
+        missing = [key for key in ("name", "filter_id", "sheet_key", "sheet_name") if not entry.get(key)]
+        if missing:
+            raise Exception(f"Sync target {entry.get('name', entry)} is missing {', '.join(missing)}.")
+        if any(target.name == entry["name"] for target in targets):
+            raise Exception(f"Duplicate sync target name: {entry['name']}.")
+
+        # Only safe characters from the name end up in the store file name
+        file_suffix = re.sub(r"[^A-Za-z0-9_-]+", "_", entry["name"])
+        targets.append(SyncTarget(
+            entry["name"],
+            entry["filter_id"],
+            entry["sheet_key"],
+            entry["sheet_name"],
+            interval_minutes=entry.get("interval_minutes") or config.get("JOB_INTERVAL_MINUTES", 60),
+            issue_store_path=entry.get("issue_store_path") or f"{base_path}_{file_suffix}{extension}"
+        ))
+    return targets
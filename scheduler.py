@@ -1,13 +1,49 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import timedelta
 
 scheduler = BackgroundScheduler()
 job_id = 'mantis_sync_job'
 
-def start_scheduler(job_func, interval_minutes=60):
-    scheduler.add_job(job_func, 'interval', minutes=interval_minutes, id=job_id)
-    scheduler.start()
+def target_job_id(target_name):
+    """
+    ID of the scheduler job of a sync target.
+    """
+    return f"{job_id}:{target_name}"
 
-def update_scheduler_interval(new_interval):
-    existing_job = scheduler.get_job(job_id)
-    if existing_job:
+def schedule_target(target_name, job_func, interval_minutes=60):
+    """
+    Run job_func(target_name) every interval_minutes, replacing the target's previous schedule.
+    """
+    scheduler.add_job(
+        job_func, 'interval', minutes=interval_minutes, args=[target_name],
+        id=target_job_id(target_name), replace_existing=True
+    )
+
+def start_scheduler():
+    """
+    Start the scheduler, or resume it if it was paused.
+    """
+    if scheduler.running:
+        scheduler.resume()
+    else:
+        scheduler.start()
+
+def pause_scheduler():
+    """
+    Stop firing jobs until start_scheduler is called again.
+    """
+    if scheduler.running:
+        scheduler.pause()
+
+def update_scheduler_interval(new_interval, target_name):
+    existing_job = scheduler.get_job(target_job_id(target_name))
+    # Rescheduling restarts the interval, so leave the job alone if it is unchanged
+    if existing_job and existing_job.trigger.interval != timedelta(minutes=new_interval):
         existing_job.reschedule(trigger='interval', minutes=new_interval)
+
+def get_next_run(target_name):
+    """
+    Next scheduled run of the target (datetime), or None if it is not scheduled.
+    """
+    job = scheduler.get_job(target_job_id(target_name))
+    return job.next_run_time if job else None
@@ -1,8 +1,21 @@
-function triggerJob() {
-    fetch('/trigger', { method: 'POST' })
+// Trigger or cancel the run of a target, or of every target when none is given
+function triggerJob(target) {
+    postJobAction('/trigger', target);
+}
+
+function cancelJob(target) {
+    postJobAction('/cancel', target);
+}
+
+function postJobAction(url, target) {
+    fetch(target ? `${url}?target=${encodeURIComponent(target)}` : url, { method: 'POST' })
         .then(response => response.json())
         .then(data => {
             alert(data.message);
+            // The event stream pushes the new state by itself, only refresh when polling
+            if (pollInterval) {
+                checkStatus();
+            }
         })
         .catch(err => console.error(err));
 }
@@ -11,12 +24,83 @@ function checkStatus() {
     fetch('/status')
         .then(response => response.json())
         .then(data => {
-            document.getElementById('job-status').innerText = data.last_status;
-            document.getElementById('progress-bar').value = data.progress;
+            renderTargets(data.targets);
+            refreshRunsOnFinish(data.targets);
         })
         .catch(err => console.error(err));
 }
 
+function renderTargets(targets) {
+    const container = document.getElementById('targets');
+    targets.forEach(target => {
+        let box = document.getElementById(`target-${target.name}`);
+        if (!box) {
+            box = createTargetBox(target.name);
+            container.appendChild(box);
+        }
+        renderStatus(box, target);
+    });
+}
+
+function createTargetBox(name) {
+    const box = document.createElement('div');
+    box.id = `target-${name}`;
+    box.className = 'target-box';
+
+    const title = document.createElement('h3');
+    title.innerText = name;
+    box.appendChild(title);
+
+    const runButton = document.createElement('button');
+    runButton.innerText = 'Run Now';
+    runButton.onclick = () => triggerJob(name);
+    box.appendChild(runButton);
+
+    const cancelButton = document.createElement('button');
+    cancelButton.innerText = 'Cancel';
+    cancelButton.onclick = () => cancelJob(name);
+    box.appendChild(cancelButton);
+
+    box.insertAdjacentHTML('beforeend', `
+        <p>Status: <span class="job-status">Idle</span></p>
+        <progress class="progress-bar" value="0" max="100"></progress>
+        <p class="job-details"></p>
+        <p>Next Scheduled Run: <span class="next-run">Not scheduled</span></p>
+    `);
+    return box;
+}
+
+function renderStatus(box, data) {
+    let jobStatus = data.last_status;
+    if (data.cancelling) {
+        jobStatus += ' (cancelling)';
+    } else if (data.waiting) {
+        jobStatus = 'Waiting for a worker';
+    } else if (data.queued) {
+        jobStatus += ' (another run queued)';
+    }
+    box.querySelector('.job-status').innerText = jobStatus;
+    box.querySelector('.progress-bar').value = data.progress;
+    box.querySelector('.next-run').innerText = data.next_run || 'Not scheduled';
+
+    const details = data.details || {};
+    let text = '';
+    if (data.running && details.stage) {
+        const pages = details.pages_total ? `${details.pages_fetched}/${details.pages_total}` : `${details.pages_fetched}`;
+        text = `Stage: ${details.stage} | Pages: ${pages} | Rows built: ${details.rows_transformed}`
+            + ` | Rows written: ${details.rows_written}`;
+        if (details.issues_per_sec !== null) {
+            text += ` | ${details.issues_per_sec} issues/s`;
+        }
+        if (details.eta_seconds !== null) {
+            text += ` | ETA: ${Math.round(details.eta_seconds)}s`;
+        }
+    } else if (data.last_run) {
+        text = `Last run: ${data.last_run}`;
+    }
+    box.querySelector('.job-details').innerText = text;
+}
+
 function goToConfig() {
     window.location.href = '/config';
 }
@@ -38,19 +122,21 @@ let countdownInterval = null;
 function fetchScheduleStatus() {
     fetch('/schedule/status')
         .then(response => response.json())
-        .then(data => {
-            if (data.next_run) {
-                document.getElementById('next-run-time').innerText = data.next_run;
-                nextRunTime = new Date(data.next_run.replace(' UTC', 'Z'));  // ISO date
-                startCountdown();
-            } else {
-                document.getElementById('next-run-time').innerText = 'Not scheduled';
-                clearInterval(countdownInterval);
-            }
-        })
+        .then(data => renderNextRun(data.next_run))
         .catch(err => console.error(err));
 }
 
+function renderNextRun(nextRun) {
+    if (nextRun) {
+        document.getElementById('next-run-time').innerText = nextRun;
+        nextRunTime = new Date(nextRun.replace(' UTC', 'Z'));  // ISO date
+        startCountdown();
+    } else {
+        document.getElementById('next-run-time').innerText = 'Not scheduled';
+        clearInterval(countdownInterval);
+    }
+}
+
 function startCountdown() {
     if (countdownInterval) {
         clearInterval(countdownInterval);
@@ -76,6 +162,111 @@ function startCountdown() {
     }, 1000);
 }
 
-// Poll every 10 seconds for next run info
-setInterval(fetchScheduleStatus, 10000);
-fetchScheduleStatus();  // Run immediately on load
+const RUNS_PER_PAGE = 10;
+let runsPage = 1;
+let lastRunSeen = null;
+
+function loadRuns(page) {
+    fetch(`/runs?page=${page}&per_page=${RUNS_PER_PAGE}`)
+        .then(response => response.json())
+        .then(data => {
+            runsPage = data.page;
+            renderRuns(data);
+        })
+        .catch(err => console.error(err));
+}
+
+function renderRuns(data) {
+    const body = document.querySelector('#runs-table tbody');
+    body.innerHTML = '';
+
+    data.runs.forEach(run => {
+        const stages = Object.entries(run.stage_durations)
+            .map(([stage, seconds]) => `${stage}: ${seconds}s`)
+            .join(', ');
+        const apiCalls = `Mantis ${run.api_calls.mantis || 0}, Sheets ${run.api_calls.sheets || 0}`;
+        const fetchTuning = run.fetch_params
+            ? `Page size ${run.fetch_params.page_size} (next ${run.fetch_params.next_page_size}), `
+                + `concurrency ${run.fetch_params.initial_concurrency} -> ${run.fetch_params.final_concurrency}`
+            : '';
+        const cells = [
+            run.started_at,
+            run.target,
+            run.trigger,
+            run.error ? `${run.outcome}: ${run.error}` : run.outcome,
+            `${run.duration_seconds}s`,
+            stages,
+            run.issues_fetched,
+            run.rows_written,
+            run.td_skipped,
+            apiCalls,
+            fetchTuning
+        ];
+
+        const row = document.createElement('tr');
+        cells.forEach(value => {
+            const cell = document.createElement('td');
+            cell.innerText = value === null ? '' : value;
+            row.appendChild(cell);
+        });
+        body.appendChild(row);
+    });
+
+    const pages = Math.max(1, Math.ceil(data.total / data.per_page));
+    document.getElementById('runs-page').innerText = `Page ${data.page} of ${pages}`;
+    document.getElementById('runs-prev').disabled = data.page <= 1;
+    document.getElementById('runs-next').disabled = data.page >= pages;
+}
+
+// Reload the run history whenever a run of any target finishes
+function refreshRunsOnFinish(targets) {
+    const lastRuns = targets.map(target => `${target.name}@${target.last_run}`).join(',');
+    if (lastRuns !== lastRunSeen) {
+        lastRunSeen = lastRuns;
+        loadRuns(runsPage);
+    }
+}
+
+// Status and schedule are pushed by the server over Server-Sent Events;
+// polling every 10 seconds is only used while the event stream is unavailable
+const POLL_INTERVAL_MS = 10000;
+let pollInterval = null;
+
+function startPolling() {
+    if (pollInterval) return;
+
+    const poll = () => {
+        fetchScheduleStatus();
+        checkStatus();
+    };
+    poll();
+    pollInterval = setInterval(poll, POLL_INTERVAL_MS);
+}
+
+function stopPolling() {
+    clearInterval(pollInterval);
+    pollInterval = null;
+}
+
+function connectEvents() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+
+    const source = new EventSource('/events');
+    source.onopen = stopPolling;
+    source.onmessage = event => {
+        const data = JSON.parse(event.data);
+        renderTargets(data.targets);
+        refreshRunsOnFinish(data.targets);
+        renderNextRun(data.next_run);
+    };
+    // The browser reconnects on its own, poll in the meantime
+    source.onerror = startPolling;
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    loadRuns(1);
+    connectEvents();
+});
@@ -0,0 +1,205 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+from processors.issue_record import IssueRecord
+
+class IssueStore:
+    # Columns added after the first release of the store, created on existing databases at startup
+    _ADDED_COLUMNS = {
+        "status": "TEXT",
+        "resolution": "TEXT",
+        "handler": "TEXT",
+        "row": "TEXT",
+        "row_computed": "INTEGER NOT NULL DEFAULT 0"
+    }
+
+    def __init__(self, db_path):
+        """
+        Initialize the local issue store backed by the SQLite database at db_path.
+
+        Every issue of the synced filter is kept keyed by its ID, together with its updated_at
+        timestamp, its IssueRecord and the sheet row computed from it.
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _create_tables(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS issues (
+                    id INTEGER PRIMARY KEY,
+                    updated_at TEXT,
+                    payload TEXT NOT NULL
+                )
+            """)
+            existing_columns = {column[1] for column in conn.execute("PRAGMA table_info(issues)")}
+            for column, definition in self._ADDED_COLUMNS.items():
+                if column not in existing_columns:
+                    conn.execute(f"ALTER TABLE issues ADD COLUMN {column} {definition}")
+
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_status ON issues (status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_resolution ON issues (resolution)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_handler ON issues (handler)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+    def get_state(self, key, default=None):
+        """
+        Get a value from the sync state table (e.g., the last high-water mark).
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        """
+        Set a value in the sync state table.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def get_issue_ids(self):
+        """
+        Return the set of issue IDs currently held in the store.
+        """
+        with closing(self._connect()) as conn:
+            return {row[0] for row in conn.execute("SELECT id FROM issues")}
+
+    def _issue_values(self, record):
+        return (
+            record.id,
+            record.updated_at,
+            record.status,
+            record.resolution,
+            record.handler,
+            json.dumps(record.as_dict())
+        )
+
+    def upsert_issues(self, issues):
+        """
+        Insert or replace the given IssueRecords. Replaced issues lose their computed row.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO issues (id, updated_at, status, resolution, handler, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                [self._issue_values(issue) for issue in issues]
+            )
+
+    def delete_issues(self, issue_ids):
+        """
+        Remove the given issue IDs from the store.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM issues WHERE id = ?", [(int(issue_id),) for issue_id in issue_ids])
+
+    def replace_all(self, issues):
+        """
+        Replace the whole content of the store with the given issues (full rebuild).
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM issues")
+            conn.executemany(
+                "INSERT OR REPLACE INTO issues (id, updated_at, status, resolution, handler, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                [self._issue_values(issue) for issue in issues]
+            )
+
+    def get_issues(self, issue_ids):
+        """
+        Return the stored IssueRecords for the given IDs, in the order of issue_ids.
+        """
+        payloads = {}
+        with closing(self._connect()) as conn:
+            for issue_id, payload in conn.execute("SELECT id, payload FROM issues"):
+                payloads[issue_id] = payload
+        return [
+            IssueRecord.from_dict(json.loads(payloads[int(issue_id)]))
+            for issue_id in issue_ids if int(issue_id) in payloads
+        ]
+
+    def get_rows(self):
+        """
+        Return the computed sheet rows still valid for their issue.
+
+        Returns:
+            dict: Issue ID to its sheet row, or to None if the issue is skipped from the sheet.
+        """
+        with closing(self._connect()) as conn:
+            return {
+                issue_id: json.loads(row)
+                for issue_id, row in conn.execute("SELECT id, row FROM issues WHERE row_computed = 1")
+            }
+
+    def save_rows(self, rows):
+        """
+        Save computed sheet rows.
+
+        Parameters:
+            rows (dict): Issue ID to its sheet row, or to None if the issue is skipped from the sheet.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "UPDATE issues SET row = ?, row_computed = 1 WHERE id = ?",
+                [(json.dumps(row), int(issue_id)) for issue_id, row in rows.items()]
+            )
+
+    def clear_rows(self):
+        """
+        Invalidate every computed row, e.g. when the sheet layout changes.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE issues SET row = NULL, row_computed = 0")
+
+    def query_issues(self, status=None, resolution=None, handler=None, limit=100, offset=0):
+        """
+        Query the stored issues without hitting Mantis.
+
+        Parameters:
+            status (str): Only return issues with this status label.
+            resolution (str): Only return issues with this resolution label.
+            handler (str): Only return issues handled by this user (real name).
+            limit (int): Maximum number of issues to return.
+            offset (int): Number of matching issues to skip.
+
+        Returns:
+            dict: The total number of matches and the requested page of issues.
+        """
+        conditions = []
+        params = []
+        for column, value in (("status", status), ("resolution", resolution), ("handler", handler)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM issues {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT id, updated_at, status, resolution, handler, row FROM issues {where} ORDER BY id LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+
+        return {
+            "total": total,
+            "issues": [
+                {
+                    "id": issue_id,
+                    "updated_at": updated_at,
+                    "status": status_label,
+                    "resolution": resolution_label,
+                    "handler": handler_name,
+                    "row": json.loads(row) if row else None
+                }
+                for issue_id, updated_at, status_label, resolution_label, handler_name, row in rows
+            ]
+        }
@@ -0,0 +1,118 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+from processors.sync_targets import DEFAULT_TARGET_NAME
+
+class RunStore:
+    # Columns added after the first release of the store, created on existing databases at startup
+    _ADDED_COLUMNS = {
+        "fetch_params": "TEXT",
+        "target": "TEXT"
+    }
+
+    def __init__(self, db_path):
+        """
+        Initialize the run history store backed by the SQLite database at db_path.
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _create_tables(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    trigger TEXT,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    duration_seconds REAL,
+                    stage_durations TEXT,
+                    issues_fetched INTEGER,
+                    rows_written INTEGER,
+                    td_skipped INTEGER,
+                    api_calls TEXT,
+                    outcome TEXT,
+                    error TEXT
+                )
+            """)
+            existing_columns = {column[1] for column in conn.execute("PRAGMA table_info(runs)")}
+            for column, definition in self._ADDED_COLUMNS.items():
+                if column not in existing_columns:
+                    conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {definition}")
+                    if column == "target":
+                        # Runs recorded before sync targets existed all belong to the default target
+                        conn.execute("UPDATE runs SET target = ?", (DEFAULT_TARGET_NAME,))
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs (started_at)")
+
+    def add_run(self, run):
+        """
+        Persist the record of a finished run.
+
+        Parameters:
+            run (dict): target, trigger, started_at, finished_at, duration_seconds, stage_durations (dict),
+                issues_fetched, rows_written, td_skipped, api_calls (dict), fetch_params (dict),
+                outcome and error.
+
+        Returns:
+            int: The ID of the stored run.
+        """
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO runs (target, trigger, started_at, finished_at, duration_seconds, stage_durations,
+                                  issues_fetched, rows_written, td_skipped, api_calls, fetch_params, outcome, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    run.get("target"),
+                    run.get("trigger"),
+                    run.get("started_at"),
+                    run.get("finished_at"),
+                    run.get("duration_seconds"),
+                    json.dumps(run.get("stage_durations", {})),
+                    run.get("issues_fetched"),
+                    run.get("rows_written"),
+                    run.get("td_skipped"),
+                    json.dumps(run.get("api_calls", {})),
+                    json.dumps(run.get("fetch_params")),
+                    run.get("outcome"),
+                    run.get("error")
+                )
+            )
+            return cursor.lastrowid
+
+    def get_runs(self, page=1, per_page=20, target=None):
+        """
+        Return a page of runs, most recent first.
+
+        Parameters:
+            target (str): Only return the runs of this sync target.
+
+        Returns:
+            dict: The total number of runs, the page details and the runs of the page.
+        """
+        page = max(1, page)
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            where, params = ("WHERE target = ?", [target]) if target else ("", [])
+            total = conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM runs {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+
+        runs = []
+        for row in rows:
+            run = dict(row)
+            run["stage_durations"] = json.loads(run["stage_durations"] or "{}")
+            run["api_calls"] = json.loads(run["api_calls"] or "{}")
+            run["fetch_params"] = json.loads(run["fetch_params"] or "null")
+            runs.append(run)
+        return {"total": total, "page": page, "per_page": per_page, "runs": runs}
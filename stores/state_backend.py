@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from threading import Lock
+
+class MemoryStateBackend:
+    def __init__(self):
+        """
+        State of the app kept in the process: job statuses, leases and pending run requests.
+
+        Only suitable for a single process, which then always holds the leases.
+        """
+        self._lock = Lock()
+        self._statuses = []
+        self._leases = {}  # name -> (holder, expires_at)
+        self._requests = []
+
+    def save_statuses(self, statuses):
+        """
+        Publish the status of every sync target.
+
+        Parameters:
+            statuses (list): One dict per target, as served by /status.
+        """
+        with self._lock:
+            self._statuses = statuses
+
+    def get_statuses(self):
+        """
+        Returns:
+            list: The last published statuses.
+        """
+        with self._lock:
+            return self._statuses
+
+    def acquire_lease(self, name, holder, ttl_seconds):
+        """
+        Take or renew a lease. A lease held by someone else can only be taken once it expired.
+
+        Parameters:
+            name (str): Name of the lease (e.g., scheduler).
+            holder (str): Identifier of the process asking for it.
+            ttl_seconds (float): Validity of the lease from now.
+
+        Returns:
+            bool: Whether the holder now holds the lease.
+        """
+        now = time.time()
+        with self._lock:
+            current = self._leases.get(name)
+            if current is None or current[0] == holder or current[1] < now:
+                self._leases[name] = (holder, now + ttl_seconds)
+                return True
+            return False
+
+    def release_lease(self, name, holder):
+        """
+        Give up a lease, if the holder holds it.
+        """
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == holder:
+                del self._leases[name]
+
+    def get_lease(self, name):
+        """
+        Returns:
+            dict: holder and expires_at (epoch seconds) of the lease, or None if nobody holds it.
+        """
+        with self._lock:
+            current = self._leases.get(name)
+            if current is None or current[1] < time.time():
+                return None
+            return {"holder": current[0], "expires_at": current[1]}
+
+    def add_request(self, target, action, options=None):
+        """
+        Ask the lease holder to act on a sync target.
+
+        Parameters:
+            target (str): Name of the sync target.
+            action (str): trigger or cancel.
+            options (dict): Options of the run (e.g., full_rebuild).
+        """
+        with self._lock:
+            self._requests.append({"target": target, "action": action, "options": options or {}})
+
+    def pop_requests(self):
+        """
+        Take the pending requests, oldest first.
+
+        Returns:
+            list: Dicts with target, action and options.
+        """
+        with self._lock:
+            requests, self._requests = self._requests, []
+            return requests
+
+class SqliteStateBackend:
+    def __init__(self, db_path):
+        """
+        State of the app shared by every process on the host through the SQLite database at
+        db_path: job statuses, leases and pending run requests. See MemoryStateBackend for the
+        meaning of each method.
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _create_tables(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_status (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    statuses TEXT,
+                    updated_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT,
+                    expires_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS run_requests (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    target TEXT,
+                    action TEXT,
+                    options TEXT,
+                    created_at REAL
+                )
+            """)
+
+    def save_statuses(self, statuses):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_status (id, statuses, updated_at) VALUES (1, ?, ?)",
+                (json.dumps(statuses), time.time())
+            )
+
+    def get_statuses(self):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT statuses FROM job_status WHERE id = 1").fetchone()
+        return json.loads(row[0]) if row else []
+
+    def acquire_lease(self, name, holder, ttl_seconds):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            # A single statement, so two processes cannot both take an expired lease
+            conn.execute(
+                """
+                INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+                """,
+                (name, holder, now + ttl_seconds, now)
+            )
+            row = conn.execute("SELECT holder FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == holder
+
+    def release_lease(self, name, holder):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+    def get_lease(self, name):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT holder, expires_at FROM leases WHERE name = ? AND expires_at >= ?", (name, time.time())
+            ).fetchone()
+        return {"holder": row[0], "expires_at": row[1]} if row else None
+
+    def add_request(self, target, action, options=None):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO run_requests (target, action, options, created_at) VALUES (?, ?, ?, ?)",
+                (target, action, json.dumps(options or {}), time.time())
+            )
+
+    def pop_requests(self):
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute("SELECT id, target, action, options FROM run_requests ORDER BY id").fetchall()
+            if rows:
+                conn.execute("DELETE FROM run_requests WHERE id <= ?", (rows[-1][0],))
+        return [{"target": target, "action": action, "options": json.loads(options)} for _, target, action, options in rows]
+
+def create_state_backend(config):
+    """
+    Create the state backend selected by STATE_BACKEND: "memory" (default, a single process)
+    or "sqlite" (every process of the host, through STATE_DB_PATH).
+
+    Raises:
+        Exception: If STATE_BACKEND is unknown.
+    """
+    backend = config.get("STATE_BACKEND", "memory")
+    if backend == "memory":
+        return MemoryStateBackend()
+    if backend == "sqlite":
+        return SqliteStateBackend(config.get("STATE_DB_PATH", "data/app_state.db"))
+    raise Exception(f"Unknown state backend: {backend}")
@@ -0,0 +1,49 @@
+import json
+import unittest
+from clients.json_stream import JsonArrayStream
+
+SAMPLE_DOCUMENTS = [
+    {"issues": []},
+    {"issues": [1.5, -2e3, 0, 10, 3.25E-2, True, False, None]},
+    {"a": 0.5, "b": 2e3, "issues": [{"id": 1}], "total_count": 12},
+    {"issues": [{"id": 7, "summary": "Café – 日本", "tags": [{"name": "x"}], "nested": {"list": [1, [2, 3]]}}]},
+    {"count": -0.0, "issues": ["a,b", "]}", "\"quoted\"", "\\"], "after": {"x": [1e10]}}
+]
+
+def split_at(document, offset):
+    return [document[:offset], document[offset:]]
+
+class JsonArrayStreamTest(unittest.TestCase):
+    def assert_decodes(self, expected, chunks):
+        stream = JsonArrayStream(chunks, "issues")
+        self.assertEqual(list(stream), expected["issues"])
+        self.assertEqual(stream.fields, {key: value for key, value in expected.items() if key != "issues"})
+
+    def test_every_split_offset(self):
+        for expected in SAMPLE_DOCUMENTS:
+            for separators in [(",", ":"), (", ", ": ")]:
+                document = json.dumps(expected, ensure_ascii=False, separators=separators).encode("utf-8")
+                for offset in range(len(document) + 1):
+                    with self.subTest(document=document, offset=offset):
+                        self.assert_decodes(expected, split_at(document, offset))
+
+    def test_one_byte_chunks(self):
+        for expected in SAMPLE_DOCUMENTS:
+            document = json.dumps(expected, ensure_ascii=False, indent=2).encode("utf-8")
+            with self.subTest(document=document):
+                self.assert_decodes(expected, [document[i:i + 1] for i in range(len(document))])
+
+    def test_number_cut_after_its_point_or_exponent(self):
+        self.assert_decodes({"issues": [1.5]}, [b'{"issues":[1.', b'5]}'])
+        self.assert_decodes({"a": 0.5, "issues": []}, [b'{"a": 0.', b'5, "issues":[]}'])
+        self.assert_decodes({"a": 2e3, "issues": []}, [b'{"a": 2e', b'3, "issues":[]}'])
+
+    def test_truncated_document_raises(self):
+        document = b'{"issues":[{"id": 1}, {"id": 2'
+        for offset in range(len(document) + 1):
+            with self.subTest(offset=offset):
+                with self.assertRaises(Exception):
+                    list(JsonArrayStream(split_at(document, offset), "issues"))
+
+if __name__ == "__main__":
+    unittest.main()
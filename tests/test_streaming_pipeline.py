@@ -0,0 +1,84 @@
+import logging
+import threading
+import unittest
+from benchmarks.fake_mantis import make_issue
+from processors.column_schema import ColumnSchema, DEFAULT_COLUMNS
+from processors.history_summary import history_values
+from processors.run_context import JobCancelled, RunContext
+from processors.streaming_pipeline import StreamingSyncPipeline
+
+class FakeMantisPages:
+    def __init__(self, page_count, page_size=10, page_delay=0.0):
+        """
+        Stand-in for MantisOperations.iter_filter_pages, yielding generated pages.
+        """
+        self.mantis_path = "https://mantis.example.com"
+        self.page_count = page_count
+        self.page_size = page_size
+        self.page_delay = page_delay
+        self.closed = threading.Event()
+
+    def iter_filter_pages(self, filter_id, fields=None, on_page=None, project=None, controller=None, ctx=None):
+        try:
+            for page in range(self.page_count):
+                if self.page_delay:
+                    threading.Event().wait(self.page_delay)
+                yield [make_issue(page * self.page_size + offset) for offset in range(self.page_size)]
+        finally:
+            self.closed.set()
+
+class FailingWorksheet:
+    def __init__(self, fail_after=1):
+        """
+        Worksheet whose update calls fail after fail_after successful ones.
+        """
+        self.fail_after = fail_after
+        self.updates = 0
+
+    def update(self, cell_range, values, value_input_option=None):
+        if self.updates >= self.fail_after:
+            raise Exception("Sheet write failed")
+        self.updates += 1
+
+class StreamingSyncPipelineTest(unittest.TestCase):
+    def run_pipeline(self, mantis_ops, sheet, ctx=None):
+        pipeline = StreamingSyncPipeline(
+            mantis_ops,
+            ColumnSchema(DEFAULT_COLUMNS, mantis_ops.mantis_path, derive=history_values),
+            logging.getLogger("test"),
+            queue_size=2,
+            write_chunk_size=10,
+            ctx=ctx
+        )
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = pipeline.run("1", lambda: sheet, clear_to_row=0)
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive(), "The pipeline did not return")
+        return outcome
+
+    def test_sheet_failure_mid_stream_fails_the_run(self):
+        # Pages smaller than a write chunk: after the failure the consumer drains the page queue
+        # without writing, so only the fetcher can tell it the stream is over
+        mantis_ops = FakeMantisPages(page_count=100, page_size=1)
+        outcome = self.run_pipeline(mantis_ops, FailingWorksheet(fail_after=1))
+
+        self.assertEqual(str(outcome.get("error")), "Sheet write failed")
+        self.assertTrue(mantis_ops.closed.wait(5))
+
+    def test_cancel_stops_a_stalled_fetch(self):
+        ctx = RunContext()
+        threading.Timer(0.2, ctx.cancel).start()
+        outcome = self.run_pipeline(FakeMantisPages(page_count=3, page_delay=2), FailingWorksheet(), ctx=ctx)
+
+        self.assertIsInstance(outcome.get("error"), JobCancelled)
+
+if __name__ == "__main__":
+    unittest.main()